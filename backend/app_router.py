@@ -1,12 +1,24 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
 from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional
-import tempfile
+from typing import List, Optional
+import json
 import os
-from logic.scene_generator import generate_storyboard_scenes_gemini
-from logic.video_generator import generate_video
-from logic.push_content import push_content
+from logic.batch import batch_registry, catalog_product, uploaded_product
+from logic.catalog import catalog
+from logic.clients import genai_client_stats
+from logic.events import run_events
+from logic.job_queue import JOB_BACKEND, job_queue, new_job_id
+from logic.memes import meme_library
+from logic.outbox import publish_outbox
+from logic.pipeline import PARALLEL_KEYFRAMES, queue_generation, resume_run
+from logic.run_ledger import run_ledger
+from logic.scene_generator import scene_image_cache, storyboard_cache
+from logic.upstream import upstream
+from logic.uploads import UploadRejected, ingest_image_upload
+from logic.video_generator import veo_poller
+from logic.workspace import get_workspace_path
 router = APIRouter(
     prefix="/api",
     tags=["api"]
@@ -26,60 +38,252 @@ async def generate_scene(
     product_name: Optional[str] = Form("product"),
     brand_name: Optional[str] = Form("brand"),
     brand_personality: Optional[str] = Form("trendy and modern"),
+    parallel_keyframes: bool = Form(PARALLEL_KEYFRAMES),
+    refresh_cache: bool = Form(False),
+    meme_type: Optional[str] = Form("GRWM"),
 ):
     """
-    Generate storyboard scenes for content creation.
+    Queue storyboard and video generation for content creation.
+
+    The pipeline runs on a background worker; poll ``/api/jobs/{job_id}``
+    for its status and result paths.
     
     Args:
         product_image: Product image file (optional)
         product_name: Name of the product
         brand_name: Name of the brand
         brand_personality: Brand personality description
+        parallel_keyframes: Generate all segments at once from per-scene keyframes
+            instead of chaining them from each previous last frame
+        refresh_cache: Ignore the cached storyboard for this prompt and regenerate it
+        meme_type: Type of meme/content; types with a template in assets/memes
+            use its scenes instead of a generated storyboard (default: GRWM)
         influencer_name: Name of the influencer (default: angeli)
-        meme_type: Type of meme/content (default: GRWM)
     """
+    influencer_name="angeli"
+    product_image_file = None
     try:
-        # Save product image if provided
-        influencer_name="angeli"
-        meme_type="GRWM"
-        product_image_file = None
+        # Validate the product image Starlette spooled, if provided
         if product_image:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp_file:
-                content = await product_image.read()
-                tmp_file.write(content)
-                product_image_file = tmp_file.name
-        
-        # Generate storyboard
-        result = generate_storyboard_scenes_gemini(
-            product_image=product_image_file if product_image_file else None,
+            product_image_file = await ingest_image_upload(product_image)
+
+        # Register the run first so its event stream exists before the job starts
+        job_id = new_job_id()
+        run_events.emit(job_id, "run_queued")
+        queue_generation(
+            job_id,
+            product_image=product_image_file,
             product_name=product_name,
             brand_name=brand_name,
             brand_personality=brand_personality,
             influencer_name=influencer_name,
-            meme_type=meme_type
+            meme_type=meme_type,
+            parallel_keyframes=parallel_keyframes,
+            refresh_cache=refresh_cache
         )
-        video_path = generate_video(prompts=result[0],initial_image_path=result[1]) 
-        # Clean up temp file if created
-
-        pushed_content = push_content( video_path=video_path, title="GRWM")
-        if product_image_file and os.path.exists(product_image_file):
-            os.unlink(product_image_file)
-        
-        return {
-            "status": "success",
-            "message": "Storyboard generated successfully"
-        }
-        
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
-        # Clean up temp file if it exists
-        if 'product_image_file' in locals() and product_image_file:
-            try:
-                print(str(e))
-                os.unlink(product_image_file)
-            except:
-                pass
-        
+        print(str(e))
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # The image was copied into the run workspace
+        if product_image_file is not None:
+            product_image_file.close()
+
+    return {
+        "status": "queued",
+        "message": "Storyboard generation queued",
+        "job_id": job_id,
+        "run_id": job_id,
+        "status_url": f"/api/jobs/{job_id}",
+        "events_url": f"/api/runs/{job_id}/events"
+    }
+
+@router.post("/batches")
+async def create_batch(
+    product_images: List[UploadFile] = File([]),
+    product_names: List[str] = Form([]),
+    catalog_products: List[str] = Form([]),
+    influencers: List[str] = Form(["angeli", "agiverse"]),
+    brand_name: Optional[str] = Form("brand"),
+    brand_personality: Optional[str] = Form("trendy and modern"),
+    meme_type: Optional[str] = Form("GRWM"),
+    parallel_keyframes: bool = Form(PARALLEL_KEYFRAMES),
+    refresh_cache: bool = Form(False),
+):
+    """
+    Queue generation for every product x influencer pair in one request.
+
+    Each item runs as its own job; poll ``/api/batches/{batch_id}`` for the
+    per-item status. Duplicate pairs are only generated once.
+
+    Args:
+        product_images: Uploaded product images
+        product_names: Names of the uploaded products, in the same order (default: file name)
+        catalog_products: Names of products from the asset catalog
+        influencers: Influencers to generate each product for
+        brand_name: Name of the brand
+        brand_personality: Brand personality description
+        meme_type: Type of meme/content
+        parallel_keyframes: Generate all segments at once from per-scene keyframes
+        refresh_cache: Ignore the cached storyboards and regenerate them
+    """
+    products = []
+    try:
+        for idx, upload in enumerate(product_images):
+            # Read each upload once; every item using it shares the bytes
+            image_file = await ingest_image_upload(upload)
+            try:
+                image = image_file.read()
+            finally:
+                image_file.close()
+            if idx < len(product_names) and product_names[idx]:
+                name = product_names[idx]
+            else:
+                name = os.path.splitext(upload.filename or "product")[0]
+            products.append(uploaded_product(name, image))
+        for name in catalog_products:
+            products.append(catalog_product(name))
+
+        batch_id = batch_registry.submit(
+            products=products,
+            influencer_names=influencers,
+            brand_name=brand_name,
+            brand_personality=brand_personality,
+            meme_type=meme_type,
+            parallel_keyframes=parallel_keyframes,
+            refresh_cache=refresh_cache
+        )
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        **batch_registry.get(batch_id),
+        "batch_id": batch_id,
+        "status_url": f"/api/batches/{batch_id}"
+    }
+
+@router.get("/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    batch = batch_registry.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"Batch not found: {batch_id}")
+    return batch
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+@router.get("/runs/{run_id}/events")
+async def stream_run_events(run_id: str, request: Request):
+    """Stream a run's progress as server-sent events.
+
+    Replays past events first; reconnecting clients resume after the
+    ``Last-Event-ID`` header they send.
+    """
+    if not run_events.exists(run_id):
+        raise HTTPException(status_code=404, detail=f"Run not found: {run_id}")
+    try:
+        after = int(request.headers.get("last-event-id", "0"))
+    except ValueError:
+        after = 0
+
+    async def event_stream():
+        async for event in run_events.subscribe(run_id, after=after):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/runs/{run_id}/cancel")
+async def cancel_run(run_id: str):
+    """Stop a run at its next stage boundary, e.g. before paying for further Veo segments."""
+    cancelled = run_events.cancel(run_id)
+    if JOB_BACKEND == "shared":
+        # The run executes on a worker process, which picks this up with its next heartbeat
+        cancelled = job_queue.cancel(run_id) or cancelled
+    if not cancelled:
+        raise HTTPException(status_code=404, detail=f"No active run: {run_id}")
+    return {"status": "cancelling", "run_id": run_id}
+
+@router.get("/runs/{run_id}")
+async def get_run(run_id: str):
+    """Recorded parameters, status and completed stages of a run."""
+    run = run_ledger.get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Run not found: {run_id}")
+    return run
+
+@router.post("/runs/{run_id}/resume")
+async def resume(run_id: str):
+    """Run a failed, cancelled or interrupted run again, skipping the stages it completed."""
+    try:
+        if not resume_run(run_id):
+            raise HTTPException(status_code=404, detail=f"Run not found: {run_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "queued", "run_id": run_id, "events_url": f"/api/runs/{run_id}/events"}
+
+@router.get("/runs/{run_id}/publish")
+async def get_run_publish_status(run_id: str):
+    """Publishing state of a run's video, per platform."""
+    posts = publish_outbox.get_run(run_id)
+    if not posts:
+        raise HTTPException(status_code=404, detail=f"Nothing published for run: {run_id}")
+    return {"run_id": run_id, "posts": posts}
+
+@router.post("/outbox/{post_id}/retry")
+async def retry_post(post_id: str):
+    """Queue a post that ran out of attempts again."""
+    if not publish_outbox.retry(post_id):
+        raise HTTPException(status_code=404, detail=f"No failed post to retry: {post_id}")
+    return {"status": "pending", "post_id": post_id}
+
+@router.get("/runs/{run_id}/artifacts/{artifact_path:path}")
+async def get_run_artifact(run_id: str, artifact_path: str):
+    try:
+        workspace = os.path.realpath(get_workspace_path(run_id))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    path = os.path.realpath(os.path.join(workspace, artifact_path))
+    if not path.startswith(workspace + os.sep) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Artifact not found: {artifact_path}")
+    return FileResponse(path)
+
+@router.get("/catalog")
+async def get_catalog():
+    return {**catalog.describe(), "memes": meme_library.describe()}
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return {
+        "storyboard": storyboard_cache.stats(),
+        "scene_images": scene_image_cache.stats()
+    }
+
+@router.get("/upstream/stats")
+async def get_upstream_stats():
+    """Queue depth and limits per upstream model, for sizing deployments."""
+    return {
+        "upstreams": upstream.stats(),
+        "genai_keys": genai_client_stats(),
+        "jobs": job_queue.stats(),
+        "veo_operations_pending": veo_poller.pending()
+    }
 
 @router.get("/info")
 async def get_info():
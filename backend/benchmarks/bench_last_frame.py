@@ -0,0 +1,85 @@
+"""Benchmark last-frame extraction on the sample Veo clips.
+
+Compares the original imageio approach (count_frames + get_data) with the
+seek-based ``logic.media.extract_last_frame``. Every measurement runs in a
+fresh process so peak RSS (including ffmpeg children) is not shared.
+
+Usage (from backend/):
+    python -m benchmarks.bench_last_frame [--repeat 3]
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "outputs", "veo3")
+
+
+def imageio_last_frame(video_path: str, output_path: str):
+    import imageio
+    from PIL import Image
+
+    reader = imageio.get_reader(video_path, format='mp4')
+    try:
+        last_frame = reader.get_data(reader.count_frames() - 1)
+    finally:
+        reader.close()
+    Image.fromarray(last_frame).save(output_path)
+
+
+def seek_last_frame(video_path: str, output_path: str):
+    from logic.media import extract_last_frame
+
+    extract_last_frame(video_path, output_path)
+
+
+STRATEGIES = {
+    "imageio_full_decode": imageio_last_frame,
+    "seek_tail": seek_last_frame,
+}
+
+
+def _measure(strategy: str, video_path: str, queue):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        STRATEGIES[strategy](video_path, os.path.join(tmp_dir, "last.png"))
+        elapsed = time.perf_counter() - start
+    # ru_maxrss is reported in KiB on Linux
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    queue.put((elapsed, self_rss, children_rss))
+
+
+def run(repeat: int):
+    ctx = multiprocessing.get_context("spawn")
+    videos = sorted(glob.glob(os.path.join(SAMPLES_DIR, "video_*.mp4")))
+    if not videos:
+        raise FileNotFoundError(f"No sample clips found in: {SAMPLES_DIR}")
+
+    print(f"{'clip':<14}{'strategy':<22}{'median s':>10}{'py RSS MiB':>12}{'ffmpeg RSS MiB':>16}")
+    for video_path in videos:
+        for strategy in STRATEGIES:
+            samples = []
+            for _ in range(repeat):
+                queue = ctx.Queue()
+                process = ctx.Process(target=_measure, args=(strategy, video_path, queue))
+                process.start()
+                samples.append(queue.get())
+                process.join()
+            elapsed = statistics.median(s[0] for s in samples)
+            self_rss = max(s[1] for s in samples) / 1024
+            children_rss = max(s[2] for s in samples) / 1024
+            print(f"{os.path.basename(video_path):<14}{strategy:<22}{elapsed:>10.3f}{self_rss:>12.1f}{children_rss:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per clip and strategy")
+    run(parser.parse_args().repeat)
@@ -0,0 +1,156 @@
+"""End-to-end pipeline benchmark against the offline fake backends.
+
+Queues N jobs through ``/api/generate_scene`` with the fake genai and
+upload-post clients, waits for all of them and reports p50/p95 latency per
+stage (from the run events), queue wait, end-to-end latency and throughput.
+Each job uses a distinct product name so storyboards and keyframes are not
+served from the caches; caches, the publish outbox, the run ledger and the
+job store live in a temporary directory. The default ``--meme-type`` has no
+template in assets/memes, so every job streams a generated storyboard;
+template types (e.g. GRWM) skip the storyboard call, and their keyframe
+prompts repeat across jobs and are served from the cache.
+
+With ``--workers N`` the API only queues jobs in the shared job store and N
+worker processes (``python -m logic.worker``) run them, ``--concurrency``
+each.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pipeline [--jobs 8] [--concurrency 2] [--latency-scale 0.05]
+                                        [--failure-rate 0] [--parallel-keyframes] [--workers 0]
+                                        [--meme-type POV]
+"""
+import argparse
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(jobs, run_events):
+    stage_ms = defaultdict(list)
+    queue_wait, latency = [], []
+    for job_id in jobs:
+        events = run_events.events(job_id)
+        by_type = {event["type"]: event for event in events}
+        for event in events:
+            if event["type"] == "stage_finished":
+                stage_ms[event["stage"]].append(event["duration_ms"])
+        finished = by_type.get("run_succeeded") or by_type.get("run_failed") or by_type.get("run_cancelled")
+        if "run_started" in by_type:
+            queue_wait.append((by_type["run_started"]["timestamp"] - by_type["run_queued"]["timestamp"]) * 1000)
+        if finished:
+            latency.append((finished["timestamp"] - by_type["run_queued"]["timestamp"]) * 1000)
+
+    rows = [(stage, values) for stage, values in stage_ms.items()]
+    rows += [("(queue wait)", queue_wait), ("(end to end)", latency)]
+    print(f"{'stage':<16}{'count':>7}{'p50 ms':>12}{'p95 ms':>12}")
+    for stage, values in rows:
+        if values:
+            print(f"{stage:<16}{len(values):>7}{percentile(values, 50):>12.1f}{percentile(values, 95):>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=2, help="MAX_CONCURRENT_JOBS")
+    parser.add_argument("--latency-scale", type=float, default=0.05, help="Multiplier for the fake API latencies")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of fake API calls failing")
+    parser.add_argument("--parallel-keyframes", action="store_true")
+    parser.add_argument("--meme-type", default="POV", help="Meme type of every job (default: one without a template)")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0: run jobs in the API process)")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="bench-cache-")
+    # Settings are read at import time, so configure the environment first
+    os.environ.update({
+        "GENAI_BACKEND": "fake",
+        "UPLOAD_BACKEND": "fake",
+        "CACHE_DIR": cache_dir,
+        "OUTBOX_DIR": os.path.join(cache_dir, "outbox"),
+        "RUN_LEDGER_PATH": os.path.join(cache_dir, "run_ledger.sqlite3"),
+        "MAX_CONCURRENT_JOBS": str(args.concurrency),
+        "FAKE_LATENCY_SCALE": str(args.latency_scale),
+        "FAKE_FAILURE_RATE": str(args.failure_rate),
+        # Compress the rate limits and retry/poll schedules along with the latencies
+        "GEMINI_REQUESTS_PER_MINUTE": str(60 / args.latency_scale),
+        "VEO_REQUESTS_PER_MINUTE": str(10 / args.latency_scale),
+        "VEO_DOWNLOAD_RPM": str(60 / args.latency_scale),
+        "VEO_POLL_RPM": str(120 / args.latency_scale),
+        "UPSTREAM_RETRY_BASE_DELAY": str(0.5 * args.latency_scale),
+        "VEO_POLL_INITIAL_INTERVAL": str(max(0.05, 2 * args.latency_scale)),
+        "VEO_POLL_MAX_INTERVAL": str(max(0.2, 20 * args.latency_scale)),
+        "JOB_BACKEND": "shared" if args.workers else "local",
+        "JOB_STORE_PATH": os.path.join(cache_dir, "jobs.sqlite3"),
+        "WORKER_POLL_INTERVAL_SECONDS": "0.1",
+    })
+    backend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    workers = [subprocess.Popen([sys.executable, "-m", "logic.worker"], cwd=backend_dir)
+               for _ in range(args.workers)]
+
+    from fastapi.testclient import TestClient
+    from main import app
+    from logic.events import run_events
+    from logic.upstream import upstream
+    from logic.workspace import get_workspace_path
+
+    jobs = []
+    try:
+        with TestClient(app) as client:
+            start = time.perf_counter()
+            for idx in range(args.jobs):
+                response = client.post("/api/generate_scene", data={
+                    "product_name": f"bench product {idx}",
+                    "brand_name": "bench",
+                    "parallel_keyframes": str(args.parallel_keyframes).lower(),
+                    "meme_type": args.meme_type,
+                })
+                response.raise_for_status()
+                jobs.append(response.json()["job_id"])
+
+            statuses = {}
+            deadline = time.monotonic() + args.timeout
+            while time.monotonic() < deadline:
+                statuses = {job_id: client.get(f"/api/jobs/{job_id}").json()["status"] for job_id in jobs}
+                if all(status not in ("queued", "running") for status in statuses.values()):
+                    break
+                time.sleep(0.1)
+            elapsed = time.perf_counter() - start
+            # Events of worker processes arrive through the relay, shortly after the job status
+            terminal = {"run_succeeded", "run_failed", "run_cancelled"}
+            while args.workers and time.monotonic() < deadline and not all(
+                    terminal & {event["type"] for event in run_events.events(job_id)} for job_id in jobs):
+                time.sleep(0.1)
+
+        done = sum(status == "succeeded" for status in statuses.values())
+        print(f"jobs={args.jobs} concurrency={args.concurrency} workers={args.workers} "
+              f"latency_scale={args.latency_scale} failure_rate={args.failure_rate} "
+              f"parallel_keyframes={args.parallel_keyframes} meme_type={args.meme_type}")
+        print(f"succeeded {done}/{len(jobs)} in {elapsed:.2f}s -> {done / elapsed * 60:.1f} jobs/min\n")
+        summarize(jobs, run_events)
+        retries = {name: stats["retries"] for name, stats in upstream.stats().items() if stats["retries"]}
+        if retries:
+            print(f"\nupstream retries: {retries}")
+    finally:
+        for worker in workers:
+            worker.terminate()
+            worker.wait()
+        for job_id in jobs:
+            shutil.rmtree(get_workspace_path(job_id), ignore_errors=True)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Regression check: a storyboard stream that breaks partway is not retried.
+
+Streams a storyboard from a fake client that fails with a retryable 503
+after two scenes, through the upstream scheduler like the pipeline does.
+Scenes already handed to ``on_scene`` start keyframes and Veo segments, so
+retrying the stream would hand them out again. Fails (exit code 1) unless
+``on_scene`` fired exactly once per streamed scene and the error surfaced.
+
+Usage (from backend/):
+    python -m benchmarks.check_storyboard_stream
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def main():
+    os.environ.update({"GENAI_BACKEND": "fake", "FAKE_LATENCY_SCALE": "0", "UPSTREAM_RETRY_BASE_DELAY": "0"})
+
+    from google.genai import errors
+    from logic.fakes import FakeGenaiClient
+    from logic.scene_generator import STORYBOARD_MODEL, StoryboardStreamError, stream_storyboard_scenes
+    from logic.upstream import upstream
+
+    client = FakeGenaiClient()
+    stream = client.models.generate_content_stream
+    calls = []
+
+    def failing_stream(**kwargs):
+        calls.append(kwargs)
+        sent = ""
+        for chunk in stream(**kwargs):
+            sent += chunk.text
+            yield chunk
+            # Break off once two complete scenes went out
+            if sent.count("}") >= 2:
+                raise errors.APIError(503, {"error": {"code": 503, "message": "stream reset", "status": "UNAVAILABLE"}})
+
+    client.models.generate_content_stream = failing_stream
+    handed_out = []
+    try:
+        upstream.call(STORYBOARD_MODEL, stream_storyboard_scenes, client, "check", handed_out.append)
+    except StoryboardStreamError as e:
+        print(f"raised: {e}")
+    else:
+        sys.exit("FAIL: the broken stream did not raise StoryboardStreamError")
+
+    descriptions = [scene.description for scene in handed_out]
+    print(f"stream requests: {len(calls)}, scenes handed out: {len(handed_out)}")
+    if len(calls) != 1 or len(descriptions) != len(set(descriptions)):
+        sys.exit("FAIL: the stream was retried and scenes were handed out more than once")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
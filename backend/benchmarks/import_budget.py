@@ -0,0 +1,80 @@
+"""Import-time budget check for the backend.
+
+Imports ``main`` in fresh interpreters with ``-X importtime`` and fails
+(exit code 1) when the best cold import exceeds the budget or when a module
+that should only load on first use (the genai SDK, IPython, upload-post)
+was imported at startup. Prints the slowest imports to show what to defer.
+
+Usage (from backend/):
+    python -m benchmarks.import_budget [--budget 1.5] [--repeat 3] [--top 15]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Seconds allowed for ``import main``; fastapi alone accounts for about half a second
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.5"))
+# Loaded by the stages that need them, never at startup
+DEFERRED_MODULES = ("google.genai", "IPython", "moviepy", "upload_post")
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_main():
+    """Import ``main`` in a new interpreter; returns {module: (self us, cumulative us, depth)}."""
+    # No API keys: the app has to boot without them
+    env = {key: value for key, value in os.environ.items() if key not in ("GENAI_API_KEY", "UPLOAD_POST_API_KEY")}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                          cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"import main failed:\n{proc.stderr[-2000:]}")
+    modules = {}
+    for match in IMPORT_LINE.finditer(proc.stderr):
+        self_us, cumulative_us, indent, name = match.groups()
+        modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+
+def _deferred_root(name: str):
+    for module in DEFERRED_MODULES:
+        if name == module or name.startswith(module + "."):
+            return module
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS, help="Seconds allowed for import main")
+    parser.add_argument("--repeat", type=int, default=3, help="Imports to run; the fastest one is checked")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    args = parser.parse_args()
+
+    runs = [import_main() for _ in range(args.repeat)]
+    best = min(runs, key=lambda modules: modules["main"][1])
+    seconds = best["main"][1] / 1e6
+
+    print(f"import main: {seconds:.3f}s (best of {args.repeat}, budget {args.budget:.3f}s)\n")
+    print(f"{'module':<48}{'cumulative ms':>15}{'self ms':>10}")
+    slowest = sorted(best.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us, _) in slowest:
+        print(f"{name:<48}{cumulative_us / 1000:>15.1f}{self_us / 1000:>10.1f}")
+
+    failures = []
+    if seconds > args.budget:
+        failures.append(f"import main took {seconds:.3f}s, over the {args.budget:.3f}s budget")
+    loaded = sorted({root for root in map(_deferred_root, best) if root})
+    if loaded:
+        failures.append(f"imported at startup, should load on first use: {', '.join(loaded)}")
+
+    if failures:
+        print("\nFAILED: " + "\n        ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from logic.catalog import catalog
+from logic.events import run_events
+from logic.job_queue import (
+    JOB_CANCELLED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, job_queue, new_job_id,
+)
+from logic.pipeline import queue_generation
+from logic.scene_generator import get_product_image_path, load_product_info
+
+
+# Maximum number of product x influencer items in one batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+
+BATCH_ACTIVE = "active"
+BATCH_FINISHED = "finished"
+
+
+def uploaded_product(name: str, image: bytes) -> Dict[str, Any]:
+    """Describe a batch product whose image was uploaded with the request."""
+    return {
+        "key": f"upload:{hashlib.sha256(image).hexdigest()}:{name}",
+        "name": name,
+        "image": image,
+        "product_data": None,
+    }
+
+
+def catalog_product(name: str) -> Dict[str, Any]:
+    """Describe a batch product taken from the asset catalog.
+
+    Raises:
+        FileNotFoundError: If the product is not in the catalog
+    """
+    # An empty info file falls back to product data built from the form fields
+    product_data = load_product_info(name) or None
+    try:
+        image = catalog.get_image_entry(get_product_image_path(name))["bytes"]
+    except FileNotFoundError:
+        image = None
+    return {
+        "key": f"catalog:{name.lower()}",
+        "name": ((product_data or {}).get("product") or {}).get("name", name),
+        "image": image,
+        "product_data": product_data,
+    }
+
+
+class BatchRegistry:
+    """Fans a product x influencer matrix out to the job queue and tracks it.
+
+    Every item is a regular pipeline job with its own run events, so
+    per-item progress is available through the usual job and run routes.
+    Items share the catalog entries, prepared images and storyboard/image
+    caches; the upstream APIs are protected by the per-upstream concurrency
+    limits rather than by the batch itself.
+    """
+
+    def __init__(self):
+        self._batches: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self,
+               products: List[Dict[str, Any]],
+               influencer_names: List[str],
+               brand_name: str,
+               brand_personality: str,
+               meme_type: str,
+               parallel_keyframes: bool,
+               refresh_cache: bool = False) -> str:
+        """Queue one pipeline job per distinct product/influencer pair.
+
+        Args:
+            products: Products built with ``uploaded_product`` or ``catalog_product``
+            influencer_names: Influencers to generate each product for
+            brand_name: Name of the brand
+            brand_personality: Brand personality description
+            meme_type: Type of meme/content
+            parallel_keyframes: Generate all segments at once from per-scene keyframes
+            refresh_cache: Ignore the cached storyboards and regenerate them
+
+        Returns:
+            The id of the batch
+
+        Raises:
+            ValueError: If the batch is empty or larger than ``BATCH_MAX_ITEMS``
+        """
+        pairs = {}
+        for product in products:
+            for influencer_name in influencer_names:
+                pairs.setdefault((product["key"], influencer_name.lower()), (product, influencer_name))
+        if not pairs:
+            raise ValueError("Batch needs at least one product and one influencer")
+        if len(pairs) > BATCH_MAX_ITEMS:
+            raise ValueError(f"Batch has {len(pairs)} items, the limit is {BATCH_MAX_ITEMS}")
+
+        batch_id = new_job_id()
+        items = []
+        for product, influencer_name in pairs.values():
+            job_id = new_job_id()
+            run_events.emit(job_id, "run_queued", batch_id=batch_id)
+            queue_generation(
+                job_id,
+                product_image=product["image"],
+                product_name=product["name"],
+                brand_name=brand_name,
+                brand_personality=brand_personality,
+                influencer_name=influencer_name,
+                meme_type=meme_type,
+                parallel_keyframes=parallel_keyframes,
+                refresh_cache=refresh_cache,
+                product_data=product["product_data"]
+            )
+            items.append({
+                "job_id": job_id,
+                "product": product["name"],
+                "influencer": influencer_name,
+            })
+
+        with self._lock:
+            self._batches[batch_id] = {
+                "id": batch_id,
+                "created_at": datetime.now(),
+                "items": items,
+            }
+        return batch_id
+
+    def get(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Return the batch with the current status of each item, or None if unknown."""
+        with self._lock:
+            batch = self._batches.get(batch_id)
+        if batch is None:
+            return None
+
+        counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_SUCCEEDED: 0, JOB_FAILED: 0, JOB_CANCELLED: 0}
+        items = []
+        for item in batch["items"]:
+            job = job_queue.get(item["job_id"]) or {}
+            status = job.get("status", JOB_QUEUED)
+            counts[status] += 1
+            items.append({
+                **item,
+                "status": status,
+                "error": job.get("error"),
+                "video_path": (job.get("result") or {}).get("video_path"),
+                "status_url": f"/api/jobs/{item['job_id']}",
+                "events_url": f"/api/runs/{item['job_id']}/events",
+            })
+        pending = counts[JOB_QUEUED] + counts[JOB_RUNNING]
+        return {
+            "id": batch["id"],
+            "status": BATCH_ACTIVE if pending else BATCH_FINISHED,
+            "created_at": batch["created_at"],
+            "counts": counts,
+            "items": items,
+        }
+
+
+batch_registry = BatchRegistry()
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from logic.job_queue import SQLITE_JOURNAL_MODE
+
+
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cache"))
+
+
+def make_cache_key(*parts) -> str:
+    """Build a stable cache key by hashing the given parts.
+
+    ``str`` parts are UTF-8 encoded, ``bytes`` are used as-is.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """Persistent key/value cache backed by SQLite.
+
+    Entries expire after ``ttl_seconds`` and the least recently used ones are
+    evicted once the cache holds more than ``max_entries`` entries or
+    ``max_bytes`` bytes. Safe to share across threads.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int, max_bytes: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+        return self._conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._remove(conn, key)
+                self.misses += 1
+                return None
+            value = self._read(key, row[0])
+            if value is None:
+                self._remove(conn, key)
+                self.misses += 1
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: bytes):
+        """Store a value and evict entries beyond the size limits."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            self._store(conn, key, value, now)
+            self._evict(conn)
+
+    def _read(self, key: str, value: bytes) -> Optional[bytes]:
+        return value
+
+    def _store(self, conn: sqlite3.Connection, key: str, value: bytes, now: float):
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value), now, now)
+        )
+
+    def _remove(self, conn: sqlite3.Connection, key: str):
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _evict(self, conn: sqlite3.Connection):
+        expired = conn.execute(
+            "SELECT key FROM entries WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        ).fetchall()
+        for (key,) in expired:
+            self._remove(conn, key)
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._remove(conn, key)
+            count -= 1
+            total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current usage."""
+        with self._lock:
+            count, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": count,
+            "bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class BlobCache(DiskCache):
+    """Content-addressed cache that keeps values as files on disk.
+
+    The SQLite index only tracks keys, sizes and access times; the blobs
+    themselves live under ``blob_dir`` so large values don't bloat the
+    database.
+    """
+
+    def __init__(self, blob_dir: str, ttl_seconds: float, max_entries: int, max_bytes: int):
+        super().__init__(os.path.join(blob_dir, "index.sqlite3"), ttl_seconds, max_entries, max_bytes)
+        self.blob_dir = blob_dir
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.blob_dir, key[:2], key)
+
+    def _read(self, key: str, value: bytes) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _store(self, conn: sqlite3.Connection, key: str, value: bytes, now: float):
+        path = self._blob_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(value)
+        os.replace(tmp_path, path)
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, b"", len(value), now, now)
+        )
+
+    def _remove(self, conn: sqlite3.Connection, key: str):
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        try:
+            os.unlink(self._blob_path(key))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,146 @@
+import copy
+import hashlib
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+INFLUENCERS = "influencers"
+PRODUCTS = "products"
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+class AssetCatalog:
+    """In-memory index of the influencer and product assets.
+
+    Keeps each entry's parsed ``info.yaml`` together with the raw bytes and
+    SHA-256 digest of every file in its ``images`` directory; images are
+    decoded only where they are used (see ``prepare_image``). Each access
+    costs a single ``stat``; the file is re-read only when its mtime changes.
+    """
+
+    def __init__(self, assets_dir: str = ASSETS_DIR):
+        self.assets_dir = os.path.abspath(assets_dir)
+        self._info: Dict[str, Dict[str, Any]] = {}
+        self._images: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Index every influencer and product and pre-load their info and images."""
+        for kind in (INFLUENCERS, PRODUCTS):
+            for name in self.list_names(kind):
+                try:
+                    self.get_info(kind, name)
+                except FileNotFoundError:
+                    pass
+                for image_name in self.list_images(kind, name):
+                    self.get_image_entry(os.path.join(self._images_dir(kind, name), image_name))
+
+    def list_names(self, kind: str) -> List[str]:
+        kind_dir = os.path.join(self.assets_dir, kind)
+        if not os.path.isdir(kind_dir):
+            return []
+        return sorted(name for name in os.listdir(kind_dir) if os.path.isdir(os.path.join(kind_dir, name)))
+
+    def list_images(self, kind: str, name: str) -> List[str]:
+        images_dir = self._images_dir(kind, name)
+        if not os.path.isdir(images_dir):
+            return []
+        return sorted(f for f in os.listdir(images_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+
+    def describe(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Return a summary of the catalog for listing in the frontend."""
+        catalog = {}
+        for kind in (INFLUENCERS, PRODUCTS):
+            entries = []
+            for name in self.list_names(kind):
+                try:
+                    info = self.get_info(kind, name) or {}
+                except FileNotFoundError:
+                    info = {}
+                section = info.get("influencer" if kind == INFLUENCERS else "product", {})
+                entries.append({
+                    "id": name,
+                    "name": section.get("name", name),
+                    "images": [os.path.splitext(f)[0] for f in self.list_images(kind, name)],
+                })
+            catalog[kind] = entries
+        return catalog
+
+    def _entry_dir(self, kind: str, name: str) -> str:
+        # Names come from requests (e.g. a batch's catalog products); keep them inside the kind's directory
+        kind_dir = os.path.realpath(os.path.join(self.assets_dir, kind))
+        path = os.path.realpath(os.path.join(kind_dir, name.lower()))
+        if (not name or os.sep in name or (os.altsep and os.altsep in name)
+                or not path.startswith(kind_dir + os.sep)):
+            raise ValueError(f"Invalid {kind[:-1]} name: {name!r}")
+        return path
+
+    def _images_dir(self, kind: str, name: str) -> str:
+        return os.path.join(self._entry_dir(kind, name), "images")
+
+    def get_info(self, kind: str, name: str) -> Dict[str, Any]:
+        """Return a copy of the parsed ``info.yaml`` of an influencer or product.
+
+        Raises:
+            FileNotFoundError: If the info file doesn't exist
+            ValueError: If the name is not a valid entry name
+        """
+        path = os.path.join(self._entry_dir(kind, name), "info.yaml")
+        mtime = _mtime(path)
+        if mtime is None:
+            with self._lock:
+                self._info.pop(path, None)
+            raise FileNotFoundError(f"{kind[:-1].capitalize()} info not found at: {path}")
+
+        with self._lock:
+            entry = self._info.get(path)
+        if entry is None or entry["mtime"] != mtime:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = {"mtime": mtime, "data": yaml.safe_load(f)}
+            with self._lock:
+                self._info[path] = entry
+        return copy.deepcopy(entry["data"])
+
+    def _get_image_entry(self, path: str) -> Dict[str, Any]:
+        mtime = _mtime(path)
+        if mtime is None:
+            with self._lock:
+                self._images.pop(path, None)
+            raise FileNotFoundError(f"Image not found at: {path}")
+
+        with self._lock:
+            entry = self._images.get(path)
+        if entry is None or entry["mtime"] != mtime:
+            with open(path, "rb") as f:
+                data = f.read()
+            entry = {
+                "mtime": mtime,
+                "path": path,
+                "bytes": data,
+                "sha256": hashlib.sha256(data).hexdigest(),
+            }
+            with self._lock:
+                self._images[path] = entry
+        return entry
+
+    def get_image_entry(self, path: str) -> Dict[str, Any]:
+        """Return the cached entry of an image file.
+
+        The entry holds ``path``, the raw ``bytes`` and their ``sha256``.
+        """
+        return self._get_image_entry(os.path.abspath(path))
+
+
+catalog = AssetCatalog()
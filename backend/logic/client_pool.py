@@ -0,0 +1,203 @@
+import functools
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Veo operations and generated videos remembered for routing back to their key
+CLIENT_POOL_MAX_AFFINITIES = 10000
+
+
+def mask_key(api_key: str) -> str:
+    """Label an API key for stats, logs and checkpoints without revealing it.
+
+    The digest keeps labels of keys ending in the same characters apart.
+    """
+    digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+    return f"key-...{api_key[-4:]}-{digest}" if len(api_key) > 8 else f"key-{digest}"
+
+
+def _affinity_key(args, kwargs) -> Optional[str]:
+    """Name of the Veo operation, or URI of the generated video, a call refers to."""
+    target = kwargs.get("operation", kwargs.get("file", args[0] if args else None))
+    video = getattr(target, "video", None)  # GeneratedVideo wraps the Video
+    if video is not None:
+        target = video
+    return getattr(target, "uri", None) or getattr(target, "name", None)
+
+
+def _operation_affinities(result) -> List[str]:
+    """Operation name and generated video URIs of a Veo operation (empty for anything else)."""
+    if not hasattr(result, "done") or not getattr(result, "name", None):
+        return []
+    keys = [result.name]
+    response = getattr(result, "result", None) or getattr(result, "response", None)
+    for generated in getattr(response, "generated_videos", None) or []:
+        if generated.video is not None and generated.video.uri:
+            keys.append(generated.video.uri)
+    return keys
+
+
+class _Member:
+    def __init__(self, label: str, client, api_key: Optional[str] = None):
+        self.label = label
+        self.client = client
+        self.api_key = api_key
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+
+
+class _PooledSection:
+    """Stand-in for ``client.models``, ``client.files`` etc. that routes every call through the pool."""
+
+    def __init__(self, pool: "GenaiClientPool", path: Tuple[str, ...]):
+        self._pool = pool
+        self._path = path
+
+    def __getattr__(self, name: str):
+        pool, path = self._pool, self._path
+
+        def resolve(member: _Member):
+            target = member.client
+            for attribute in path:
+                target = getattr(target, attribute)
+            return getattr(target, name)
+
+        template = resolve(pool._members[0])
+        if inspect.iscoroutinefunction(template):
+            @functools.wraps(template)
+            async def call_async(*args, **kwargs):
+                member = pool._acquire(_affinity_key(args, kwargs))
+                try:
+                    result = await resolve(member)(*args, **kwargs)
+                except BaseException:
+                    pool._release(member, failed=True)
+                    raise
+                pool._release(member, result=result)
+                return result
+            return call_async
+
+        @functools.wraps(template)
+        def call(*args, **kwargs):
+            member = pool._acquire(_affinity_key(args, kwargs))
+            try:
+                result = resolve(member)(*args, **kwargs)
+            except BaseException:
+                pool._release(member, failed=True)
+                raise
+            if inspect.isgenerator(result):
+                # Streams stay outstanding until they are consumed
+                return pool._stream(member, result)
+            pool._release(member, result=result)
+            return result
+        return call
+
+
+class _PooledAio:
+    def __init__(self, pool: "GenaiClientPool"):
+        self.models = _PooledSection(pool, ("aio", "models"))
+        self.operations = _PooledSection(pool, ("aio", "operations"))
+
+
+class GenaiClientPool:
+    """Shares genai calls between one long-lived client per API key.
+
+    Exposes the parts of ``genai.Client`` the pipeline uses (``models``,
+    ``files``, ``operations`` and ``aio``). Every call goes to the key with
+    the fewest requests in flight; Veo operations and their videos only
+    exist in the project that created them, so polls and downloads are sent
+    to the key that submitted the operation. Each client keeps its HTTP
+    connections open and is safe to share across threads.
+    """
+
+    def __init__(self, clients: Dict[str, Any], api_keys: Optional[Dict[str, str]] = None,
+                 max_affinities: int = CLIENT_POOL_MAX_AFFINITIES):
+        if not clients:
+            raise ValueError("GenaiClientPool needs at least one client")
+        api_keys = api_keys or {}
+        self._members = [_Member(label, client, api_keys.get(label)) for label, client in clients.items()]
+        self._affinities: "OrderedDict[str, _Member]" = OrderedDict()
+        self._max_affinities = max_affinities
+        self._lock = threading.Lock()
+        self.models = _PooledSection(self, ("models",))
+        self.files = _PooledSection(self, ("files",))
+        self.operations = _PooledSection(self, ("operations",))
+        self.aio = _PooledAio(self)
+
+    def _acquire(self, affinity: Optional[str] = None) -> _Member:
+        with self._lock:
+            member = self._affinities.get(affinity) if affinity else None
+            if member is None:
+                # Unknown affinities fall back to the least loaded key; operations recorded before a
+                # restart are assigned to their key first (see ``assign``)
+                member = min(self._members, key=lambda m: (m.outstanding, m.requests))
+            member.outstanding += 1
+            member.requests += 1
+            return member
+
+    def _release(self, member: _Member, result: Any = None, failed: bool = False):
+        with self._lock:
+            member.outstanding -= 1
+            if failed:
+                member.errors += 1
+                return
+            for key in _operation_affinities(result):
+                self._affinities[key] = member
+                self._affinities.move_to_end(key)
+            while len(self._affinities) > self._max_affinities:
+                self._affinities.popitem(last=False)
+
+    def key_for(self, affinity: str) -> Optional[str]:
+        """Label of the key a Veo operation or video belongs to, if known."""
+        with self._lock:
+            member = self._affinities.get(affinity)
+            return member.label if member is not None else None
+
+    def assign(self, affinity: str, label: str) -> bool:
+        """Send calls for ``affinity`` to the key labelled ``label``, e.g. an operation recorded before a restart.
+
+        Returns:
+            False if no key has that label (e.g. it was removed from the configuration)
+        """
+        with self._lock:
+            member = next((member for member in self._members if member.label == label), None)
+            if member is None:
+                return False
+            self._affinities[affinity] = member
+            self._affinities.move_to_end(affinity)
+            while len(self._affinities) > self._max_affinities:
+                self._affinities.popitem(last=False)
+            return True
+
+    def route(self, affinity: Optional[str], fn: Callable[[Any, Optional[str]], Any]) -> Any:
+        """Call ``fn(client, api_key)`` with the key owning ``affinity`` (e.g. a video URI).
+
+        For requests made outside the genai SDK, such as streaming a
+        generated video; they count towards the key's stats like any call.
+        """
+        member = self._acquire(affinity)
+        try:
+            result = fn(member.client, member.api_key)
+        except BaseException:
+            self._release(member, failed=True)
+            raise
+        self._release(member)
+        return result
+
+    def _stream(self, member: _Member, chunks):
+        try:
+            yield from chunks
+        except BaseException:
+            self._release(member, failed=True)
+            raise
+        self._release(member)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return requests in flight, requests made and errors per key."""
+        with self._lock:
+            return {
+                member.label: {"outstanding": member.outstanding, "requests": member.requests, "errors": member.errors}
+                for member in self._members
+            }
@@ -0,0 +1,95 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "live" talks to the real APIs, "fake" uses the offline stand-ins from logic.fakes
+GENAI_BACKEND = os.getenv("GENAI_BACKEND", "live")
+UPLOAD_BACKEND = os.getenv("UPLOAD_BACKEND", "live")
+# Comma-separated keys to share genai calls between (falls back to GENAI_API_KEY); the
+# upstream scheduler limits in logic.upstream are totals across all keys
+GENAI_API_KEYS = list(dict.fromkeys(
+    key.strip() for key in os.getenv("GENAI_API_KEYS", os.getenv("GENAI_API_KEY", "")).split(",") if key.strip()
+))
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client(kind: str, factory):
+    with _clients_lock:
+        client = _clients.get(kind)
+        if client is None:
+            client = _clients[kind] = factory()
+        return client
+
+
+def _new_genai_client():
+    from logic.client_pool import GenaiClientPool, mask_key
+    if GENAI_BACKEND == "fake":
+        from logic.fakes import FakeBehaviour, FakeGenaiClient
+        behaviour = FakeBehaviour()
+        names = [f"fake{index}" for index in range(len(GENAI_API_KEYS))] or ["fake"]
+        # Fake keys are named after their client, which lets the fake downloads check the routing
+        return GenaiClientPool({name: FakeGenaiClient(behaviour, name=name) for name in names},
+                               api_keys={name: name for name in names})
+    if not GENAI_API_KEYS:
+        raise ValueError("GENAI_API_KEY is not set in environment variables. Please check your .env file.")
+    from google import genai
+    # One long-lived client per key, so its HTTP connections are reused across requests
+    return GenaiClientPool({mask_key(key): genai.Client(api_key=key) for key in GENAI_API_KEYS},
+                           api_keys={mask_key(key): key for key in GENAI_API_KEYS})
+
+
+def _new_upload_client():
+    if UPLOAD_BACKEND == "fake":
+        from logic.fakes import FakeUploadPostClient
+        return FakeUploadPostClient()
+    from upload_post import UploadPostClient
+    return UploadPostClient(api_key=os.getenv("UPLOAD_POST_API_KEY"))
+
+
+def _new_download_client():
+    import httpx
+    from logic.downloads import DOWNLOAD_TIMEOUT_SECONDS
+    if GENAI_BACKEND == "fake":
+        from logic.fakes import fake_download_transport
+        return httpx.Client(transport=fake_download_transport(), timeout=DOWNLOAD_TIMEOUT_SECONDS)
+    # Video URIs redirect to the storage host
+    return httpx.Client(timeout=DOWNLOAD_TIMEOUT_SECONDS, follow_redirects=True)
+
+
+def get_genai_client():
+    """Return the shared genai client pool, creating it on first use."""
+    return _get_client("genai", _new_genai_client)
+
+
+def genai_client_stats():
+    """Return per-key usage of the genai client pool, or {} before its first use."""
+    with _clients_lock:
+        client = _clients.get("genai")
+    return client.stats() if hasattr(client, "stats") else {}
+
+
+def get_upload_client():
+    """Return the shared upload-post client, creating it on first use."""
+    return _get_client("upload", _new_upload_client)
+
+
+def get_download_client():
+    """Return the shared HTTP client for streaming generated media to disk."""
+    return _get_client("download", _new_download_client)
+
+
+def set_genai_client(client):
+    """Replace the shared genai client (e.g. with a configured fake)."""
+    with _clients_lock:
+        _clients["genai"] = client
+
+
+def set_upload_client(client):
+    """Replace the shared upload-post client (e.g. with a configured fake)."""
+    with _clients_lock:
+        _clients["upload"] = client
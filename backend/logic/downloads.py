@@ -0,0 +1,108 @@
+import base64
+import hashlib
+import os
+from typing import Any, Dict, Optional
+
+# Bytes written per chunk; a download holds about twice this in memory, whatever the file size
+DOWNLOAD_CHUNK_BYTES = int(os.getenv("DOWNLOAD_CHUNK_BYTES", str(256 * 1024)))
+# Range requests continuing a truncated download before giving up (the caller may retry from scratch)
+DOWNLOAD_MAX_RESUMES = int(os.getenv("DOWNLOAD_MAX_RESUMES", "3"))
+DOWNLOAD_TIMEOUT_SECONDS = float(os.getenv("DOWNLOAD_TIMEOUT_SECONDS", "120"))
+
+
+class IncompleteDownload(ConnectionError):
+    """A download ended short of its announced size or failed its checksum."""
+
+
+def _expected_size(response, offset: int) -> Optional[int]:
+    content_range = response.headers.get("content-range", "")
+    total = content_range.rpartition("/")[2]
+    if total.isdigit():
+        return int(total)
+    length = response.headers.get("content-length")
+    return offset + int(length) if length and length.isdigit() else None
+
+
+def _expected_md5(response) -> Optional[str]:
+    # Cloud Storage reports the object's checksums as e.g. "crc32c=...,md5=<base64>"
+    for part in response.headers.get("x-goog-hash", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name == "md5":
+            return value
+    return None
+
+
+def stream_to_file(http, url: str, out_path: str, headers: Optional[Dict[str, str]] = None,
+                   chunk_size: int = DOWNLOAD_CHUNK_BYTES, max_resumes: int = DOWNLOAD_MAX_RESUMES) -> Dict[str, Any]:
+    """Download a URL to a file chunk by chunk, continuing truncated transfers with Range requests.
+
+    Data goes to ``out_path + ".part"``, which replaces ``out_path`` only
+    once the size announced by the server (and its MD5, if it sends one)
+    matches.
+
+    Args:
+        http: ``httpx.Client`` to download with
+        url: URL to download
+        out_path: Destination file
+        headers: Extra request headers (e.g. the API key)
+        chunk_size: Bytes read and written at a time
+        max_resumes: Range requests allowed after the first request
+
+    Returns:
+        Dictionary with the file ``size`` and the number of ``resumes``
+
+    Raises:
+        IncompleteDownload: If the file is still incomplete after ``max_resumes``
+            resumes or fails its checksum
+        httpx.HTTPError: If a request fails before any data arrived or after the last resume
+    """
+    import httpx
+
+    part_path = out_path + ".part"
+    md5 = hashlib.md5()
+    written = 0
+    expected_size = expected_md5 = None
+    resumes = 0
+    try:
+        with open(part_path, "wb") as f:
+            while True:
+                request_headers = dict(headers or {})
+                if written:
+                    request_headers["Range"] = f"bytes={written}-"
+                try:
+                    with http.stream("GET", url, headers=request_headers) as response:
+                        response.raise_for_status()
+                        if written and response.status_code != 206:
+                            # The server ignored the range; start over
+                            f.seek(0)
+                            f.truncate()
+                            md5 = hashlib.md5()
+                            written = 0
+                        expected_size = _expected_size(response, written)
+                        expected_md5 = expected_md5 or _expected_md5(response)
+                        for chunk in response.iter_bytes(chunk_size):
+                            f.write(chunk)
+                            md5.update(chunk)
+                            written += len(chunk)
+                except (httpx.TransportError, ConnectionError):
+                    # Nothing to continue from, or out of resumes: let the caller retry
+                    if not written or resumes >= max_resumes:
+                        raise
+                else:
+                    if expected_size is None or written >= expected_size:
+                        break
+                    if resumes >= max_resumes:
+                        raise IncompleteDownload(f"Download of {url} stopped at {written} of {expected_size} bytes")
+                resumes += 1
+        if expected_size is not None and written != expected_size:
+            raise IncompleteDownload(f"Download of {url} has {written} bytes, expected {expected_size}")
+        if expected_md5 and base64.b64encode(md5.digest()).decode() != expected_md5:
+            raise IncompleteDownload(f"Download of {url} failed its MD5 check")
+        os.replace(part_path, out_path)
+    except BaseException:
+        try:
+            os.remove(part_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return {"size": written, "resumes": resumes}
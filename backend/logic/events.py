@@ -0,0 +1,302 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from logic.job_queue import JobCancelled, JobLeaseLost, SharedJobStore
+from logic.metrics import observe_span
+from logic.workspace import get_workspace_path
+
+
+# Number of finished runs whose event history is kept in memory
+RUN_EVENTS_MAX_RUNS = int(os.getenv("RUN_EVENTS_MAX_RUNS", "200"))
+
+_current_run: contextvars.ContextVar = contextvars.ContextVar("current_run", default=None)
+
+
+class RunCancelled(JobCancelled):
+    """Raised at the next stage boundary after a run has been cancelled."""
+
+
+class RunLeaseLost(JobLeaseLost):
+    """Raised before the next stage or checkpoint of a run whose job another worker took over."""
+
+
+class RunEventBroker:
+    """Collects progress events per run and fans them out to subscribers.
+
+    Events are emitted from pipeline worker threads and consumed by async
+    SSE handlers; subscribers are woken on their own event loop.
+    """
+
+    def __init__(self, max_runs: int = RUN_EVENTS_MAX_RUNS):
+        self.max_runs = max_runs
+        self._runs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        """Call ``listener(run_id, event)`` for every event emitted from now on."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def register(self, run_id: str):
+        """Start tracking a run so it can be subscribed to before its first event."""
+        with self._lock:
+            if run_id not in self._runs:
+                self._runs[run_id] = {"events": [], "timings": {}, "finished": False, "cancelled": False,
+                                      "lease_lost": False, "waiters": set()}
+            self._prune()
+
+    def _prune(self):
+        finished = [run_id for run_id, run in self._runs.items() if run["finished"]]
+        for run_id in finished[:max(0, len(finished) - self.max_runs)]:
+            del self._runs[run_id]
+
+    def exists(self, run_id: str) -> bool:
+        with self._lock:
+            return run_id in self._runs
+
+    def emit(self, run_id: str, event_type: str, **data) -> Dict[str, Any]:
+        """Append an event to a run and wake its subscribers."""
+        self.register(run_id)
+        with self._lock:
+            run = self._runs[run_id]
+            event = {"seq": len(run["events"]) + 1, "type": event_type, "timestamp": time.time(), **data}
+            if run["lease_lost"]:
+                # The worker that took the job over reports its progress now
+                return event
+            run["events"].append(event)
+            if event_type in ("run_succeeded", "run_failed", "run_cancelled"):
+                run["finished"] = True
+            elif event_type == "run_queued":
+                # A resumed run starts a new attempt under the same id
+                run["finished"] = run["cancelled"] = False
+            waiters = list(run["waiters"])
+            listeners = list(self._listeners)
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(waiter.set)
+        for listener in listeners:
+            try:
+                listener(run_id, event)
+            except Exception as e:
+                print(f"Run event listener failed: {e}")
+        return event
+
+    def events(self, run_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            run = self._runs.get(run_id)
+            return list(run["events"][after:]) if run else []
+
+    def record_timing(self, run_id: str, name: str, seconds: float):
+        """Add a completed span to the run's timing breakdown."""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return
+            timing = run["timings"].setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            timing["count"] += 1
+            timing["total_ms"] = round(timing["total_ms"] + seconds * 1000, 1)
+            timing["max_ms"] = max(timing["max_ms"], round(seconds * 1000, 1))
+
+    def timings(self, run_id: str) -> Dict[str, Dict[str, float]]:
+        """Return the run's time per span name (count, total and max in ms)."""
+        with self._lock:
+            run = self._runs.get(run_id)
+            return {name: dict(timing) for name, timing in run["timings"].items()} if run else {}
+
+    def cancel(self, run_id: str) -> bool:
+        """Request cancellation of a run; returns False if it is unknown or already finished."""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None or run["finished"]:
+                return False
+            run["cancelled"] = True
+        return True
+
+    def claim(self, run_id: str):
+        """Start running a job's run in this process, e.g. after a worker claimed it."""
+        self.register(run_id)
+        with self._lock:
+            self._runs[run_id]["lease_lost"] = False
+
+    def lose_lease(self, run_id: str):
+        """Stop a run whose job another worker took over, without finishing it.
+
+        The run raises ``RunLeaseLost`` before its next stage or checkpoint,
+        and its events from this process are dropped from then on.
+        """
+        self.register(run_id)
+        with self._lock:
+            self._runs[run_id]["lease_lost"] = True
+
+    def is_lease_lost(self, run_id: str) -> bool:
+        with self._lock:
+            run = self._runs.get(run_id)
+            return bool(run and run["lease_lost"])
+
+    def is_cancelled(self, run_id: str) -> bool:
+        with self._lock:
+            run = self._runs.get(run_id)
+            return bool(run and run["cancelled"])
+
+    async def subscribe(self, run_id: str, after: int = 0, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield the run's events after ``after`` until it finishes.
+
+        Yields None every ``keepalive`` seconds without events so callers can
+        keep the connection alive.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = asyncio.Event()
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return
+            run["waiters"].add((loop, waiter))
+        try:
+            while True:
+                waiter.clear()
+                with self._lock:
+                    new_events = run["events"][after:]
+                    finished = run["finished"]
+                for event in new_events:
+                    yield event
+                after += len(new_events)
+                if finished:
+                    return
+                try:
+                    await asyncio.wait_for(waiter.wait(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                run["waiters"].discard((loop, waiter))
+
+
+run_events = RunEventBroker()
+
+
+def start_event_relay(store: SharedJobStore, poll_interval: float = 0.5) -> threading.Event:
+    """Re-emit run events that worker processes stored in the job store into ``run_events``.
+
+    Lets an API process stream the progress of runs executed elsewhere;
+    only events stored after the relay starts are relayed.
+
+    Returns:
+        Event that stops the relay when set
+    """
+    stop = threading.Event()
+
+    def loop():
+        last_id = store.last_event_id()
+        while not stop.is_set():
+            try:
+                for event_id, run_id, event_type, data in store.events_after(last_id):
+                    run_events.emit(run_id, event_type, **data)
+                    last_id = event_id
+            except Exception as e:
+                print(f"Run event relay failed: {e}")
+            stop.wait(poll_interval)
+
+    threading.Thread(target=loop, name="run-event-relay", daemon=True).start()
+    return stop
+
+
+@contextmanager
+def bind_run(run_id: str):
+    """Attribute events emitted in this context (and copied contexts) to a run."""
+    token = _current_run.set(run_id)
+    try:
+        yield
+    finally:
+        _current_run.reset(token)
+
+
+def current_run() -> Optional[str]:
+    return _current_run.get()
+
+
+def emit_event(event_type: str, **data):
+    """Emit an event for the current run; a no-op outside of a run."""
+    run_id = _current_run.get()
+    if run_id is not None:
+        run_events.emit(run_id, event_type, **data)
+
+
+def raise_if_lease_lost(before: str):
+    """Raise ``RunLeaseLost`` if another worker took over the current run's job."""
+    run_id = _current_run.get()
+    if run_id is not None and run_events.is_lease_lost(run_id):
+        raise RunLeaseLost(f"Lost the lease on run {run_id} before {before}")
+
+
+def record_span(name: str, seconds: float, outcome: str = "ok"):
+    """Record a timed span in the metrics and in the current run's timing breakdown."""
+    observe_span(name, seconds, outcome)
+    run_id = _current_run.get()
+    if run_id is not None:
+        run_events.record_timing(run_id, name, seconds)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as a span without emitting progress events."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        record_span(name, time.perf_counter() - start, outcome)
+
+
+@contextmanager
+def stage(name: str, **data):
+    """Emit start/finish events with timings around a pipeline stage.
+
+    Cancellation requested for the current run, or the loss of its job's
+    lease, is raised when a stage starts.
+    The duration is also recorded as a span (see ``record_span``).
+    Extra fields set on the yielded dict (e.g. artifact URLs) are included in
+    the ``stage_finished`` event.
+
+    Args:
+        name: Stage name
+        **data: Extra fields for both events (e.g. segment index)
+    """
+    raise_if_lease_lost(f"stage {name}")
+    run_id = _current_run.get()
+    if run_id is not None and run_events.is_cancelled(run_id):
+        raise RunCancelled(f"Run {run_id} was cancelled before stage {name}")
+
+    result: Dict[str, Any] = {}
+    emit_event("stage_started", stage=name, **data)
+    start = time.perf_counter()
+    try:
+        yield result
+    except Exception as e:
+        duration = time.perf_counter() - start
+        record_span(name, duration, "error")
+        emit_event("stage_failed", stage=name, duration_ms=round(duration * 1000, 1), error=str(e), **data)
+        raise
+    duration = time.perf_counter() - start
+    record_span(name, duration)
+    emit_event("stage_finished", stage=name, duration_ms=round(duration * 1000, 1), **data, **result)
+
+
+def artifact_url(path: str) -> Optional[str]:
+    """Return the API URL serving a file from the current run's workspace."""
+    run_id = _current_run.get()
+    if run_id is None:
+        return None
+    workspace = os.path.abspath(get_workspace_path(run_id))
+    relative = os.path.relpath(os.path.abspath(path), workspace)
+    if relative.startswith(".."):
+        return None
+    return f"/api/runs/{run_id}/artifacts/{relative}"
@@ -0,0 +1,312 @@
+import base64
+import functools
+import glob
+import hashlib
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+import httpx
+from google.genai import errors, types
+from upload_post import UploadPostError
+
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "outputs", "veo3")
+
+# Mean latencies in seconds; each call sleeps for the mean +/- FAKE_LATENCY_JITTER
+FAKE_TEXT_LATENCY = float(os.getenv("FAKE_TEXT_LATENCY", "2"))
+FAKE_IMAGE_LATENCY = float(os.getenv("FAKE_IMAGE_LATENCY", "6"))
+FAKE_VIDEO_LATENCY = float(os.getenv("FAKE_VIDEO_LATENCY", "60"))
+FAKE_DOWNLOAD_LATENCY = float(os.getenv("FAKE_DOWNLOAD_LATENCY", "1"))
+FAKE_UPLOAD_LATENCY = float(os.getenv("FAKE_UPLOAD_LATENCY", "3"))
+# Fake video downloads are sent in chunks of this many bytes
+FAKE_DOWNLOAD_CHUNK_BYTES = 64 * 1024
+FAKE_LATENCY_JITTER = float(os.getenv("FAKE_LATENCY_JITTER", "0.25"))
+# Multiplier applied to every latency, e.g. 0.05 for quick local runs
+FAKE_LATENCY_SCALE = float(os.getenv("FAKE_LATENCY_SCALE", "1"))
+# Fraction of calls failing with a 429 or 503
+FAKE_FAILURE_RATE = float(os.getenv("FAKE_FAILURE_RATE", "0"))
+
+# Scenes are tagged with a digest of the prompt so different prompts yield different keyframe prompts
+FAKE_SCENES = [
+    {"description": "Close-up of the influencer holding the product up to the camera ({tag})",
+     "expression": "Excited, wide smile", "effects": "Soft glow around the product"},
+    {"description": "The influencer tries the product on in front of a mirror ({tag})",
+     "expression": "Playful smirk", "effects": "Quick zoom on the reflection"},
+    {"description": "Wide shot of the influencer showing off the product ({tag})",
+     "expression": "Confident pose", "effects": "Sparkles around the outfit"},
+]
+# Streamed storyboards arrive in chunks of this many characters
+FAKE_STREAM_CHUNK_SIZE = 48
+
+
+class FakeBehaviour:
+    """Latency and failure injection shared by the fake clients.
+
+    Every call sleeps for a jittered latency and fails at ``failure_rate``
+    with a retryable API error, exercising the upstream scheduler.
+    """
+
+    def __init__(self,
+                 latency_scale: float = FAKE_LATENCY_SCALE,
+                 jitter: float = FAKE_LATENCY_JITTER,
+                 failure_rate: float = FAKE_FAILURE_RATE,
+                 seed=None):
+        self.latency_scale = latency_scale
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def latency(self, mean: float) -> float:
+        with self._lock:
+            factor = self._random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(0.0, mean * factor * self.latency_scale)
+
+    def call(self, mean_latency: float, what: str):
+        """Sleep for one call's latency, then possibly fail it."""
+        time.sleep(self.latency(mean_latency))
+        self.maybe_fail(what)
+
+    def maybe_fail(self, what: str):
+        with self._lock:
+            self.calls += 1
+            failed = self._random.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+                code = self._random.choice((429, 503))
+        if failed:
+            status = "RESOURCE_EXHAUSTED" if code == 429 else "UNAVAILABLE"
+            raise errors.APIError(code, {"error": {"code": code, "message": f"Injected {what} failure", "status": status}})
+
+
+def _sample_files(pattern: str):
+    paths = sorted(glob.glob(os.path.join(SAMPLES_DIR, pattern)))
+    if not paths:
+        raise FileNotFoundError(f"No samples matching {pattern} in {SAMPLES_DIR}")
+    return paths
+
+
+class _FakeModels:
+    def __init__(self, client: "FakeGenaiClient"):
+        self._client = client
+
+    def generate_content(self, model: str, contents, config=None):
+        modalities = getattr(config, "response_modalities", None) or []
+        if "IMAGE" in modalities:
+            self._client.behaviour.call(FAKE_IMAGE_LATENCY, "image generation")
+            parts = [
+                types.Part(text="Here is the scene."),
+                types.Part(inline_data=types.Blob(data=self._client.next_image(), mime_type="image/png")),
+            ]
+        else:
+            self._client.behaviour.call(FAKE_TEXT_LATENCY, "text generation")
+            parts = [types.Part(text=self._storyboard(contents, config))]
+        return self._response(parts)
+
+    def generate_content_stream(self, model: str, contents, config=None):
+        # The request fails up front; the text then trickles in over the text latency
+        self._client.behaviour.maybe_fail("text generation")
+        text = self._storyboard(contents, config)
+        chunks = [text[i:i + FAKE_STREAM_CHUNK_SIZE] for i in range(0, len(text), FAKE_STREAM_CHUNK_SIZE)]
+        for chunk in chunks:
+            time.sleep(self._client.behaviour.latency(FAKE_TEXT_LATENCY) / len(chunks))
+            yield self._response([types.Part(text=chunk)])
+
+    def _storyboard(self, contents, config) -> str:
+        tag = hashlib.sha256(str(contents).encode("utf-8")).hexdigest()[:8]
+        scenes = [{key: value.format(tag=tag) for key, value in scene.items()} for scene in FAKE_SCENES]
+        if getattr(config, "response_mime_type", None) == "application/json":
+            return json.dumps(scenes)
+        return "\n".join(f"SCENE {i + 1}: {scene['description']}" for i, scene in enumerate(scenes))
+
+    def _response(self, parts):
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=parts))]
+        )
+
+    def generate_videos(self, model: str, prompt: str = None, image=None, config=None, **kwargs):
+        self._client.behaviour.maybe_fail("video submission")
+        return self._client.start_operation()
+
+
+class _FakeOperations:
+    def __init__(self, client: "FakeGenaiClient"):
+        self._client = client
+
+    def get(self, operation):
+        self._client.behaviour.maybe_fail("operation poll")
+        return self._client.operation_status(operation)
+
+
+class _FakeAsyncOperations(_FakeOperations):
+    async def get(self, operation):
+        self._client.behaviour.maybe_fail("operation poll")
+        return self._client.operation_status(operation)
+
+
+class _FakeAio:
+    def __init__(self, client: "FakeGenaiClient"):
+        self.operations = _FakeAsyncOperations(client)
+
+
+class _FakeFiles:
+    def __init__(self, client: "FakeGenaiClient"):
+        self._client = client
+
+    def download(self, file, config=None) -> bytes:
+        self._client.behaviour.call(FAKE_DOWNLOAD_LATENCY, "download")
+        video = file.video if isinstance(file, types.GeneratedVideo) else file
+        with open(self._client.video_path(video.uri), "rb") as f:
+            data = f.read()
+        video.video_bytes = data
+        return data
+
+
+class FakeGenaiClient:
+    """Mimics the parts of ``genai.Client`` used by the pipeline, offline.
+
+    Enabled with ``GENAI_BACKEND=fake`` (see ``logic.clients``). Text calls
+    return or stream a fixed three-scene storyboard, image calls return the
+    sample last frames and Veo operations complete ``FAKE_VIDEO_LATENCY``
+    seconds after submission with one of the sample clips in
+    ``assets/outputs/veo3``. ``name`` keeps operation names and video URIs
+    of several fake keys apart.
+    """
+
+    def __init__(self, behaviour: FakeBehaviour = None, name: str = "fake"):
+        self.behaviour = behaviour or FakeBehaviour()
+        self.name = name
+        self.models = _FakeModels(self)
+        self.operations = _FakeOperations(self)
+        self.aio = _FakeAio(self)
+        self.files = _FakeFiles(self)
+        self._images = [Path(path).read_bytes() for path in _sample_files("frame_*.png")]
+        self._videos = _sample_files("video_*.mp4")
+        self._counter = itertools.count()
+        self._deadlines = {}
+        self._lock = threading.Lock()
+
+    def next_image(self) -> bytes:
+        return self._images[next(self._counter) % len(self._images)]
+
+    def video_path(self, uri: str) -> str:
+        return self._videos[int(uri.rsplit("/", 1)[-1]) % len(self._videos)]
+
+    def start_operation(self) -> types.GenerateVideosOperation:
+        index = next(self._counter)
+        name = f"models/{self.name}-veo/operations/{index}"
+        with self._lock:
+            self._deadlines[name] = (time.monotonic() + self.behaviour.latency(FAKE_VIDEO_LATENCY), index)
+        return types.GenerateVideosOperation(name=name, done=False)
+
+    def operation_status(self, operation) -> types.GenerateVideosOperation:
+        if not operation.name.startswith(f"models/{self.name}-veo/"):
+            # Like Veo, an operation is only visible to the key (project) that started it
+            raise errors.APIError(404, {"error": {"code": 404, "message": f"Operation {operation.name} not found",
+                                                  "status": "NOT_FOUND"}})
+        with self._lock:
+            # Operations from before a restart are treated as finished
+            deadline, index = self._deadlines.get(operation.name, (0, int(operation.name.rsplit("/", 1)[-1])))
+        if time.monotonic() < deadline:
+            return types.GenerateVideosOperation(name=operation.name, done=False)
+        response = types.GenerateVideosResponse(generated_videos=[
+            types.GeneratedVideo(video=types.Video(uri=f"fake://{self.name}/videos/{index}", mime_type="video/mp4"))
+        ])
+        return types.GenerateVideosOperation(name=operation.name, done=True, response=response, result=response)
+
+
+@functools.lru_cache(maxsize=None)
+def _md5_header(path: str) -> str:
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(FAKE_DOWNLOAD_CHUNK_BYTES), b""):
+            md5.update(chunk)
+    return "md5=" + base64.b64encode(md5.digest()).decode()
+
+
+class _FakeVideoStream(httpx.SyncByteStream):
+    """Sends a sample clip from ``start``, dropping the connection at ``stop`` if set."""
+
+    def __init__(self, path: str, start: int, stop: int = None):
+        self.path = path
+        self.start = start
+        self.stop = stop
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            f.seek(self.start)
+            position = self.start
+            while True:
+                size = FAKE_DOWNLOAD_CHUNK_BYTES
+                if self.stop is not None:
+                    size = min(size, self.stop - position)
+                    if size <= 0:
+                        raise httpx.RemoteProtocolError("peer closed connection without sending complete message body")
+                chunk = f.read(size)
+                if not chunk:
+                    return
+                position += len(chunk)
+                yield chunk
+
+
+def fake_download_transport(behaviour: FakeBehaviour = None) -> httpx.MockTransport:
+    """Serves the sample clips for fake video URIs like the Files API download endpoint.
+
+    Requests must carry the ``x-goog-api-key`` of the fake client that
+    generated the video. Range requests are honoured; injected 503 failures
+    drop the connection halfway through the body and 429s are returned as is.
+    """
+    behaviour = behaviour or FakeBehaviour()
+    videos = _sample_files("video_*.mp4")
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        # URIs look like fake://<client name>/videos/<index>
+        if request.headers.get("x-goog-api-key") != request.url.host:
+            return httpx.Response(403, json={"error": {"code": 403, "message": "Video belongs to another key"}})
+        path = videos[int(request.url.path.rsplit("/", 1)[-1]) % len(videos)]
+        size = os.path.getsize(path)
+        start = int(request.headers.get("range", "bytes=0-")[len("bytes="):].split("-")[0] or 0)
+        stop = None
+        try:
+            behaviour.call(FAKE_DOWNLOAD_LATENCY, "download")
+        except errors.APIError as e:
+            if e.code == 429:
+                return httpx.Response(429)
+            stop = start + (size - start) // 2
+        headers = {"content-type": "video/mp4", "content-length": str(size - start), "x-goog-hash": _md5_header(path)}
+        if start:
+            headers["content-range"] = f"bytes {start}-{size - 1}/{size}"
+        return httpx.Response(206 if start else 200, headers=headers, stream=_FakeVideoStream(path, start, stop))
+
+    return httpx.MockTransport(handle)
+
+
+class FakeUploadPostClient:
+    """Mimics ``UploadPostClient.upload_video`` without uploading anything.
+
+    Enabled with ``UPLOAD_BACKEND=fake``.
+    """
+
+    def __init__(self, behaviour: FakeBehaviour = None):
+        self.behaviour = behaviour or FakeBehaviour()
+        self._counter = itertools.count()
+
+    def upload_video(self, video_path, title=None, user="", platforms=None, **kwargs):
+        if not Path(video_path).exists():
+            raise UploadPostError(f"Video file not found: {video_path}")
+        try:
+            self.behaviour.call(FAKE_UPLOAD_LATENCY, "upload")
+        except errors.APIError as e:
+            raise UploadPostError(str(e)) from e
+        return {
+            "success": True,
+            "request_id": f"fake-{next(self._counter)}",
+            "results": {platform: {"success": True, "url": None} for platform in platforms or []},
+        }
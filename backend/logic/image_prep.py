@@ -0,0 +1,122 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+import PIL.Image
+
+
+# Images larger than this (longest side, in pixels) are downsized before upload
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "1536"))
+# Images larger than this (in bytes) are re-encoded before upload
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(2 * 1024 ** 2)))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "90"))
+# Number of prepared images memoized in memory
+IMAGE_PREP_CACHE_SIZE = int(os.getenv("IMAGE_PREP_CACHE_SIZE", "64"))
+
+# Formats the Gemini and Veo APIs accept as-is
+PASSTHROUGH_FORMATS = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
+
+
+class PreparedImage(NamedTuple):
+    """Image payload ready for upload."""
+    data: bytes
+    mime_type: str
+    sha256: str  # digest of the source bytes, not of ``data``
+    passthrough: bool
+
+
+_prepared: "OrderedDict[tuple, PreparedImage]" = OrderedDict()
+_prepared_lock = threading.Lock()
+
+
+def read_image_source(image_source) -> bytes:
+    """Return the encoded bytes of an image input.
+
+    Args:
+        image_source: File path, raw bytes, file-like object or PIL Image
+
+    Returns:
+        The file content; PIL Images without a backing file are encoded as PNG
+    """
+    if isinstance(image_source, bytes):
+        return image_source
+    if isinstance(image_source, str):
+        with open(image_source, "rb") as f:
+            return f.read()
+    if isinstance(image_source, PIL.Image.Image):
+        buffer = io.BytesIO()
+        image_source.save(buffer, format="PNG")
+        return buffer.getvalue()
+    # File-like object: read it and rewind for later readers
+    position = image_source.tell()
+    data = image_source.read()
+    image_source.seek(position)
+    return data
+
+
+def _encode(image: PIL.Image.Image, max_dimension: int) -> Tuple[bytes, str]:
+    image.thumbnail((max_dimension, max_dimension), PIL.Image.LANCZOS)
+    buffer = io.BytesIO()
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        # Keep transparency
+        image.save(buffer, format="PNG", optimize=True)
+        mime_type = PASSTHROUGH_FORMATS["PNG"]
+    else:
+        image.convert("RGB").save(buffer, format="JPEG", quality=IMAGE_JPEG_QUALITY)
+        mime_type = PASSTHROUGH_FORMATS["JPEG"]
+    return buffer.getvalue(), mime_type
+
+
+def prepare_image(image_source,
+                  max_dimension: int = IMAGE_MAX_DIMENSION,
+                  max_bytes: int = IMAGE_MAX_BYTES,
+                  source_sha256: Optional[str] = None) -> PreparedImage:
+    """Prepare an image for upload to Gemini or Veo.
+
+    Images already in an accepted format and within the size limits are
+    passed through untouched. Anything else is downsized to
+    ``max_dimension`` and re-encoded once. Results are memoized per source
+    digest, so repeated uploads of the same image cost one hash.
+
+    Args:
+        image_source: File path, raw bytes, file-like object or PIL Image
+        max_dimension: Maximum width/height in pixels
+        max_bytes: Maximum payload size for pass-through
+        source_sha256: Precomputed digest of the source bytes, if known
+
+    Returns:
+        The prepared payload
+    """
+    data = read_image_source(image_source)
+    if source_sha256 is None:
+        source_sha256 = hashlib.sha256(data).hexdigest()
+
+    key = (source_sha256, max_dimension, max_bytes)
+    with _prepared_lock:
+        prepared = _prepared.get(key)
+        if prepared is not None:
+            _prepared.move_to_end(key)
+            return prepared
+
+    # Opening only parses the header; pixels are decoded only when re-encoding
+    with PIL.Image.open(io.BytesIO(data)) as image:
+        mime_type = PASSTHROUGH_FORMATS.get(image.format)
+        if mime_type and max(image.size) <= max_dimension and len(data) <= max_bytes:
+            prepared = PreparedImage(data, mime_type, source_sha256, True)
+        else:
+            image.load()
+            encoded, mime_type = _encode(image, max_dimension)
+            prepared = PreparedImage(encoded, mime_type, source_sha256, False)
+
+    with _prepared_lock:
+        _prepared[key] = prepared
+        while len(_prepared) > IMAGE_PREP_CACHE_SIZE:
+            _prepared.popitem(last=False)
+    return prepared
@@ -0,0 +1,410 @@
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+# Number of generation pipelines allowed to run at the same time (per worker process)
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
+# "local" runs jobs on this process's thread pool; "shared" only queues them in the job
+# store, where worker processes (python -m logic.worker) on the same host claim them
+JOB_BACKEND = os.getenv("JOB_BACKEND", "local")
+# Journal mode of the SQLite files shared between processes (job store, run ledger, outbox, caches).
+# WAL needs memory shared between the processes, which some bind mounts and volume drivers do not
+# provide; no journal mode makes SQLite safe on a network filesystem, so workers on several hosts
+# need a server-backed queue instead of the shared job store
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "DELETE" if JOB_BACKEND == "shared" else "WAL")
+# Shared job store; every API and worker process must see the same file on a local disk
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "assets", "outputs", "jobs.sqlite3"))
+# A claimed job whose worker stops heartbeating for this long is handed to another worker
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("JOB_HEARTBEAT_INTERVAL_SECONDS", "15"))
+# Claims per job before it is failed, so a job that keeps killing its worker is not retried forever
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Run events relayed from worker processes to the API are kept this long
+JOB_EVENTS_MAX_AGE_HOURS = float(os.getenv("JOB_EVENTS_MAX_AGE_HOURS", "24"))
+# Finished jobs kept in memory by the local queue for status lookups, beyond those young enough
+# to be kept by age (see ``JobQueue.prune``)
+JOB_HISTORY_MAX_JOBS = int(os.getenv("JOB_HISTORY_MAX_JOBS", "1000"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_FINISHED = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised by a job that stopped because it was cancelled."""
+
+
+class JobLeaseLost(JobCancelled):
+    """Raised by a job whose worker lost its lease; another worker runs the job now."""
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+def task_name(fn: Callable[..., Any]) -> str:
+    """Importable name of a job function, e.g. ``logic.pipeline:run_generation_pipeline``."""
+    return f"{fn.__module__}:{fn.__qualname__}"
+
+
+def resolve_task(name: str) -> Callable[..., Any]:
+    module, _, qualname = name.partition(":")
+    target = importlib.import_module(module)
+    for attribute in qualname.split("."):
+        target = getattr(target, attribute)
+    return target
+
+
+def run_job(fn: Callable[..., Any], job_id: str, kwargs: Dict[str, Any]) -> Tuple[str, Any, Optional[str]]:
+    """Run a job function.
+
+    Returns:
+        Final status, result and error message
+    """
+    try:
+        result = fn(job_id=job_id, **kwargs)
+    except JobCancelled as e:
+        return JOB_CANCELLED, None, str(e)
+    except Exception as e:
+        traceback.print_exc()
+        return JOB_FAILED, None, str(e)
+    return JOB_SUCCEEDED, result, None
+
+
+class JobQueue:
+    """In-process job queue that runs blocking pipelines on a worker pool.
+
+    Jobs are submitted from the event loop and executed on a bounded
+    thread pool, so long-running generation never blocks request handling.
+    """
+
+    def __init__(self, max_workers: int = MAX_CONCURRENT_JOBS):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], job_id: Optional[str] = None, **kwargs) -> str:
+        """Queue a job for execution.
+
+        Args:
+            fn: Callable to run; it receives ``job_id`` plus the given keyword arguments
+            job_id: Id to use for the job (default: a new random id)
+            **kwargs: Keyword arguments forwarded to ``fn``
+
+        Returns:
+            The id of the queued job
+        """
+        job_id = job_id or new_job_id()
+        with self._lock:
+            self._jobs[job_id] = {
+                "id": job_id,
+                "status": JOB_QUEUED,
+                "created_at": datetime.now(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+        self._executor.submit(self._run, job_id, fn, kwargs)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a snapshot of the job state, or None if the id is unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of jobs per status."""
+        counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_SUCCEEDED: 0, JOB_FAILED: 0, JOB_CANCELLED: 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return counts
+
+    def active(self) -> Set[str]:
+        """Return the ids of queued and running jobs."""
+        with self._lock:
+            return {job_id for job_id, job in self._jobs.items() if job["status"] in (JOB_QUEUED, JOB_RUNNING)}
+
+    def prune(self, max_age_hours: float, max_jobs: int = JOB_HISTORY_MAX_JOBS) -> int:
+        """Forget finished jobs older than ``max_age_hours``, then the oldest beyond ``max_jobs``.
+
+        Returns:
+            Number of jobs forgotten
+        """
+        cutoff = datetime.now() - timedelta(hours=max_age_hours)
+        with self._lock:
+            finished = sorted((job for job in self._jobs.values() if job["status"] in JOB_FINISHED),
+                              key=lambda job: job["finished_at"])
+            overflow = len(finished) - max_jobs
+            expired = [job for index, job in enumerate(finished) if index < overflow or job["finished_at"] < cutoff]
+            for job in expired:
+                del self._jobs[job["id"]]
+        return len(expired)
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id: str, fn: Callable[..., Any], kwargs: Dict[str, Any]):
+        self._update(job_id, status=JOB_RUNNING, started_at=datetime.now())
+        status, result, error = run_job(fn, job_id, kwargs)
+        self._update(job_id, status=status, result=result, error=error, finished_at=datetime.now())
+
+
+def _timestamp(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value) if value is not None else None
+
+
+class SharedJobStore:
+    """Jobs and their run events in SQLite, shared by the API and worker processes of one host.
+
+    Workers claim queued jobs under a lease and extend it with heartbeats;
+    a job whose lease expires (its worker crashed or hung) is claimed again
+    by any worker and resumes from the run ledger's checkpoints. Writes by
+    a worker that lost its lease are ignored.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, task TEXT NOT NULL, kwargs TEXT NOT NULL, status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, worker_id TEXT, lease_until REAL, "
+                "cancel_requested INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, type TEXT NOT NULL, "
+                "data TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+        return self._conn
+
+    def enqueue(self, job_id: str, task: str, kwargs: Dict[str, Any]):
+        """Queue a job; queueing a finished job id again starts it over."""
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO jobs (id, task, kwargs, status, created_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET task = excluded.task, kwargs = excluded.kwargs, "
+                "status = excluded.status, attempts = 0, worker_id = NULL, lease_until = NULL, "
+                "cancel_requested = 0, result = NULL, error = NULL, created_at = excluded.created_at, "
+                "started_at = NULL, finished_at = NULL",
+                (job_id, task, json.dumps(kwargs), JOB_QUEUED, time.time())
+            )
+
+    def claim(self, worker_id: str, limit: int, lease_seconds: float = JOB_LEASE_SECONDS,
+              max_attempts: int = JOB_MAX_ATTEMPTS) -> List[Dict[str, Any]]:
+        """Lease up to ``limit`` queued jobs, or running jobs whose lease expired, to a worker."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = 'Worker ' || worker_id || ' stopped responding', "
+                    "finished_at = ? WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                    (JOB_FAILED, now, JOB_RUNNING, now, max_attempts)
+                )
+                rows = conn.execute(
+                    "SELECT id, task, kwargs, cancel_requested FROM jobs "
+                    "WHERE status = ? OR (status = ? AND lease_until < ?) ORDER BY created_at LIMIT ?",
+                    (JOB_QUEUED, JOB_RUNNING, now, limit)
+                ).fetchall()
+                for row in rows:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, worker_id = ?, lease_until = ?, attempts = attempts + 1, "
+                        "started_at = ? WHERE id = ?",
+                        (JOB_RUNNING, worker_id, now + lease_seconds, now, row["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [{"id": row["id"], "task": row["task"], "kwargs": json.loads(row["kwargs"]),
+                 "cancel_requested": bool(row["cancel_requested"])} for row in rows]
+
+    def heartbeat(self, worker_id: str, job_ids: List[str],
+                  lease_seconds: float = JOB_LEASE_SECONDS) -> Tuple[Set[str], Set[str]]:
+        """Extend a worker's leases.
+
+        Returns:
+            Ids of the given jobs that were cancelled, and of those whose lease
+            the worker lost (e.g. another worker took the job over)
+        """
+        if not job_ids:
+            return set(), set()
+        placeholders = ",".join("?" * len(job_ids))
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"UPDATE jobs SET lease_until = ? WHERE worker_id = ? AND status = ? AND id IN ({placeholders})",
+                (time.time() + lease_seconds, worker_id, JOB_RUNNING, *job_ids)
+            )
+            owned = {row["id"]: bool(row["cancel_requested"]) for row in conn.execute(
+                f"SELECT id, cancel_requested FROM jobs WHERE worker_id = ? AND status = ? AND id IN ({placeholders})",
+                (worker_id, JOB_RUNNING, *job_ids)
+            ).fetchall()}
+        return ({job_id for job_id, cancel_requested in owned.items() if cancel_requested},
+                {job_id for job_id in job_ids if job_id not in owned})
+
+    def finish(self, job_id: str, worker_id: str, status: str, result: Any = None, error: Optional[str] = None):
+        """Record a job's outcome, unless the worker no longer holds its lease."""
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL "
+                "WHERE id = ? AND worker_id = ? AND status = ?",
+                (status, json.dumps(result, default=str), error, time.time(), job_id, worker_id, JOB_RUNNING)
+            )
+
+    def release(self, worker_id: str, job_ids: List[str]):
+        """Hand a stopping worker's jobs back to the queue without counting the attempt."""
+        with self._lock:
+            self._connect().executemany(
+                "UPDATE jobs SET status = ?, worker_id = NULL, lease_until = NULL, attempts = attempts - 1 "
+                "WHERE id = ? AND worker_id = ? AND status = ?",
+                [(JOB_QUEUED, job_id, worker_id, JOB_RUNNING) for job_id in job_ids]
+            )
+
+    def request_cancel(self, job_id: str) -> bool:
+        """Ask the worker running (or about to run) a job to cancel it."""
+        with self._lock:
+            cursor = self._connect().execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN (?, ?)",
+                (job_id, JOB_QUEUED, JOB_RUNNING)
+            )
+        return cursor.rowcount > 0
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "status": row["status"],
+            "created_at": _timestamp(row["created_at"]),
+            "started_at": _timestamp(row["started_at"]),
+            "finished_at": _timestamp(row["finished_at"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "worker_id": row["worker_id"],
+            "attempts": row["attempts"],
+        }
+
+    def stats(self) -> Dict[str, int]:
+        counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_SUCCEEDED: 0, JOB_FAILED: 0, JOB_CANCELLED: 0}
+        with self._lock:
+            for status, count in self._connect().execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall():
+                counts[status] = count
+        return counts
+
+    def active(self) -> Set[str]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?)", (JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+        return {job_id for (job_id,) in rows}
+
+    def append_event(self, run_id: str, event: Dict[str, Any]):
+        """Store a run event emitted by a worker for the API processes to relay."""
+        data = {key: value for key, value in event.items() if key not in ("seq", "type")}
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO job_events (run_id, type, data, created_at) VALUES (?, ?, ?, ?)",
+                (run_id, event["type"], json.dumps(data, default=str), time.time())
+            )
+
+    def events_after(self, event_id: int, limit: int = 500) -> List[Tuple[int, str, str, Dict[str, Any]]]:
+        """Return (id, run id, type, data) of the stored events after ``event_id``."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, run_id, type, data FROM job_events WHERE id > ? ORDER BY id LIMIT ?", (event_id, limit)
+            ).fetchall()
+        return [(row["id"], row["run_id"], row["type"], json.loads(row["data"])) for row in rows]
+
+    def last_event_id(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM job_events").fetchone()[0]
+
+    def prune(self, max_age_hours: float) -> int:
+        """Delete finished jobs older than ``max_age_hours``."""
+        with self._lock:
+            cursor = self._connect().execute(
+                f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(JOB_FINISHED))}) AND finished_at < ?",
+                (*JOB_FINISHED, time.time() - max_age_hours * 3600)
+            )
+        return cursor.rowcount
+
+    def prune_events(self, max_age_hours: float = JOB_EVENTS_MAX_AGE_HOURS):
+        with self._lock:
+            self._connect().execute(
+                "DELETE FROM job_events WHERE created_at < ?", (time.time() - max_age_hours * 3600,)
+            )
+
+
+class SharedJobQueue:
+    """Job queue that only records jobs in the shared store; worker processes run them.
+
+    Offers the same interface as ``JobQueue``. Job functions must be
+    importable module-level functions and their arguments JSON-serializable.
+    """
+
+    def __init__(self, store: Optional[SharedJobStore] = None):
+        self.store = store or SharedJobStore()
+
+    def submit(self, fn: Callable[..., Any], job_id: Optional[str] = None, **kwargs) -> str:
+        job_id = job_id or new_job_id()
+        self.store.enqueue(job_id, task_name(fn), kwargs)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        return self.store.stats()
+
+    def active(self) -> Set[str]:
+        return self.store.active()
+
+    def cancel(self, job_id: str) -> bool:
+        return self.store.request_cancel(job_id)
+
+    def prune(self, max_age_hours: float) -> int:
+        return self.store.prune(max_age_hours)
+
+    def shutdown(self, wait: bool = False):
+        pass
+
+
+job_queue = SharedJobQueue() if JOB_BACKEND == "shared" else JobQueue()
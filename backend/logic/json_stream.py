@@ -0,0 +1,81 @@
+import json
+from typing import Any, List, Optional
+
+
+class JsonArrayStream:
+    """Incremental parser for a JSON array that arrives in chunks.
+
+    Feed it text as it streams in; every object or array element is decoded
+    and returned as soon as its closing bracket arrives, before the rest of
+    the array is known. Scalar elements are not supported.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._element_start: Optional[int] = None
+        self.started = False
+        self.done = False
+
+    def feed(self, text: str) -> List[Any]:
+        """Consume a chunk and return the elements it completed.
+
+        Raises:
+            ValueError: If the text is not a JSON array of objects/arrays
+        """
+        self._buffer += text
+        elements = []
+        while self._pos < len(self._buffer):
+            char = self._buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif self.done:
+                if not char.isspace():
+                    raise ValueError(f"Unexpected data after the JSON array: {char!r}")
+            elif not self.started:
+                if char == "[":
+                    self.started = True
+                    self._depth = 1
+                elif not char.isspace():
+                    raise ValueError(f"Expected a JSON array, got {char!r}")
+            elif char == '"':
+                if self._depth < 2:
+                    raise ValueError("Scalar array elements are not supported")
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 2:
+                    self._element_start = self._pos
+            elif char in "}]":
+                if self._depth == 2:
+                    elements.append(json.loads(self._buffer[self._element_start:self._pos + 1]))
+                    self._element_start = None
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+            self._pos += 1
+
+        # Only keep the element currently being received
+        cut = self._element_start if self._element_start is not None else self._pos
+        self._buffer = self._buffer[cut:]
+        self._pos -= cut
+        if self._element_start is not None:
+            self._element_start = 0
+        return elements
+
+    def close(self):
+        """Check that the whole array was received.
+
+        Raises:
+            ValueError: If the array is incomplete
+        """
+        if not self.done:
+            raise ValueError("JSON array ended before it was complete")
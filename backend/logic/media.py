@@ -0,0 +1,153 @@
+import os
+import re
+import subprocess
+import tempfile
+from typing import List, Tuple
+
+import imageio_ffmpeg
+from PIL import Image
+
+
+# How far before the end of a clip to seek before decoding the tail
+LAST_FRAME_TAIL_SECONDS = float(os.getenv("LAST_FRAME_TAIL_SECONDS", "1.0"))
+
+
+def get_ffmpeg_exe() -> str:
+    """Return the ffmpeg binary bundled with imageio-ffmpeg (or FFMPEG_BINARY)."""
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def _decode_last_frame(video_path: str, frame_path: str, tail_seconds: float = None):
+    cmd = [get_ffmpeg_exe(), "-v", "error", "-y"]
+    if tail_seconds:
+        # Input seeking jumps to the keyframe before the tail, so only the last GOP is decoded
+        cmd += ["-sseof", f"-{tail_seconds}"]
+    # -update 1 keeps overwriting a single image, leaving the last decoded frame.
+    # PPM is written uncompressed so per-frame encoding cost stays negligible.
+    cmd += ["-i", video_path, "-an", "-sn", "-update", "1", "-c:v", "ppm", "-f", "image2", frame_path]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def extract_last_frame(video_path: str, output_path: str, tail_seconds: float = LAST_FRAME_TAIL_SECONDS) -> str:
+    """Extract the last frame of a video without decoding the whole file.
+
+    Seeks ``tail_seconds`` before the end of the clip and decodes from the
+    preceding keyframe only. Falls back to a full decode when the seek yields
+    no frame (e.g. clips shorter than the tail window).
+
+    Args:
+        video_path: Path to the video file
+        output_path: Where to save the frame; the format follows the file extension
+        tail_seconds: Length of the tail window to decode
+
+    Returns:
+        Path to the saved frame
+    """
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Video not found at: {video_path}")
+
+    fd, frame_path = tempfile.mkstemp(suffix=".ppm", dir=os.path.dirname(os.path.abspath(output_path)))
+    os.close(fd)
+    try:
+        os.unlink(frame_path)
+        try:
+            _decode_last_frame(video_path, frame_path, tail_seconds)
+        except subprocess.CalledProcessError:
+            pass
+        if not os.path.exists(frame_path) or os.path.getsize(frame_path) == 0:
+            _decode_last_frame(video_path, frame_path)
+
+        with Image.open(frame_path) as frame:
+            frame.save(output_path)
+    finally:
+        if os.path.exists(frame_path):
+            os.unlink(frame_path)
+
+    return output_path
+
+
+CONCAT_STREAM_COPY = "stream_copy"
+CONCAT_REENCODE = "reencode"
+
+_STREAM_LINE = re.compile(r"Stream #\d+:\d+[^:]*: (Video|Audio): (.*)")
+# Parts of the stream description that may differ between segments without breaking a stream copy
+_VOLATILE_PARTS = re.compile(r"\s*\d+ kb/s,?|\s*\((default|forced)\)|, SAR \d+:\d+ DAR \d+:\d+")
+
+
+def probe_stream_signature(video_path: str) -> Tuple[str, ...]:
+    """Return a normalized description of a file's audio/video streams.
+
+    Two files with equal signatures share codec, profile, pixel format,
+    resolution, frame rate, time base and audio layout, so they can be
+    concatenated without re-encoding.
+    """
+    result = subprocess.run(
+        [get_ffmpeg_exe(), "-hide_banner", "-i", video_path],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    signature = []
+    for line in result.stderr.splitlines():
+        match = _STREAM_LINE.search(line)
+        if match:
+            signature.append(f"{match.group(1)}: {_VOLATILE_PARTS.sub('', match.group(2)).strip().rstrip(',')}")
+    return tuple(signature)
+
+
+def _concat_stream_copy(video_paths: List[str], output_path: str):
+    fd, list_path = tempfile.mkstemp(suffix=".txt", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        with os.fdopen(fd, "w") as f:
+            for path in video_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        subprocess.run(
+            [get_ffmpeg_exe(), "-v", "error", "-y", "-f", "concat", "-safe", "0", "-i", list_path,
+             "-c", "copy", "-movflags", "+faststart", output_path],
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+    finally:
+        os.unlink(list_path)
+
+
+def _concat_reencode(video_paths: List[str], output_path: str):
+    from moviepy.editor import VideoFileClip, concatenate_videoclips
+
+    clips = [VideoFileClip(path) for path in video_paths]
+    try:
+        final_clip = concatenate_videoclips(clips, method="compose")
+        final_clip.write_videofile(output_path, codec="libx264", audio_codec="aac")
+        final_clip.close()
+    finally:
+        for clip in clips:
+            clip.close()
+
+
+def concat_videos(video_paths: List[str], output_path: str) -> str:
+    """Concatenate video segments into one file.
+
+    Segments with identical stream parameters are joined with a stream copy
+    (no decoding or re-encoding). Otherwise, or if the copy fails, they are
+    re-encoded with moviepy.
+
+    Args:
+        video_paths: Segment files in playback order
+        output_path: Path of the combined video
+
+    Returns:
+        The method used: CONCAT_STREAM_COPY or CONCAT_REENCODE
+    """
+    if not video_paths:
+        raise ValueError("No videos to concatenate")
+
+    signatures = {probe_stream_signature(path) for path in video_paths}
+    if len(signatures) == 1 and all(signatures):
+        try:
+            _concat_stream_copy(video_paths, output_path)
+            return CONCAT_STREAM_COPY
+        except subprocess.CalledProcessError as e:
+            print(f"Stream copy concat failed, re-encoding instead: {e.stderr.decode(errors='replace').strip()}")
+    else:
+        print(f"Segment stream parameters differ, re-encoding: {signatures}")
+
+    _concat_reencode(video_paths, output_path)
+    return CONCAT_REENCODE
@@ -0,0 +1,185 @@
+import os
+import string
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import yaml
+
+
+MEMES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "memes")
+
+INFLUENCER_INPUT = "influencer"
+PRODUCT_INPUT = "product"
+
+# Image variables a scene can declare, mapped to the input they come from and the
+# influencer image name (products use their main image), in the order they are sent
+IMAGE_VARIABLES = {
+    "full_body_image": (INFLUENCER_INPUT, "full_body"),
+    "portrait_image": (INFLUENCER_INPUT, "portrait"),
+    "product_image": (PRODUCT_INPUT, None),
+}
+
+
+def _lookup(data: Dict[str, Any], path: str, default: Any = "") -> Any:
+    value = data
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return default
+        value = value.get(key)
+    return default if value in (None, "", []) else value
+
+
+def _join(values, limit: Optional[int] = None) -> str:
+    if isinstance(values, list):
+        return ", ".join(str(value) for value in values[:limit])
+    return str(values)
+
+
+# Prompt placeholders, resolved from (influencer data, product data)
+TEMPLATE_VARIABLES: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], str]] = {
+    "influencer_name": lambda inf, prod: _lookup(inf, "influencer.name", "the influencer"),
+    "personality_traits": lambda inf, prod: _join(_lookup(inf, "personality.traits", [])),
+    "brand_voice": lambda inf, prod: _lookup(inf, "brand_voice.tone", "engaging"),
+    "content_style": lambda inf, prod: _lookup(inf, "influencer.content_style", "lifestyle content"),
+    "social_media_handle": lambda inf, prod: _lookup(inf, "social_media.tiktok", _lookup(inf, "influencer.name")),
+    "recommendation_style": lambda inf, prod: _lookup(inf, "brand_voice.style", "casual"),
+    "catchphrase": lambda inf, prod: _lookup(inf, "catchphrase", "Let's go!"),
+    "product_name": lambda inf, prod: _lookup(prod, "product.name", "the product"),
+    "brand_name": lambda inf, prod: _lookup(prod, "product.brand", "the brand"),
+    "key_features": lambda inf, prod: _join(_lookup(prod, "features.key_features", []), 3),
+    "price": lambda inf, prod: _lookup(prod, "product.price_range", _lookup(prod, "product.price")),
+    "usage_instructions": lambda inf, prod: _lookup(
+        prod, "usage_instructions", f"How I use my {_lookup(prod, 'product.name', 'product')}"),
+    "benefits": lambda inf, prod: _join(_lookup(prod, "benefits", _lookup(prod, "features.key_features", [])), 3),
+    "texture_description": lambda inf, prod: _lookup(prod, "texture_description", "look and feel"),
+}
+
+
+class MemeScene(NamedTuple):
+    """A compiled scene of a meme template."""
+    name: str
+    inputs: Tuple[str, ...]
+    images: Tuple[str, ...]  # image variables, influencer images first
+    prompt: str
+    fields: Tuple[str, ...]  # placeholders used by the prompt
+
+
+class MemeTemplate(NamedTuple):
+    """A compiled meme template."""
+    meme_type: str
+    scenes: Tuple[MemeScene, ...]
+    path: str
+
+    def render(self, influencer_data: Dict[str, Any], product_data: Dict[str, Any]) -> List[str]:
+        """Render every scene's prompt from the influencer and product data."""
+        values = {}
+        prompts = []
+        for scene in self.scenes:
+            for field in scene.fields:
+                if field not in values:
+                    values[field] = TEMPLATE_VARIABLES[field](influencer_data or {}, product_data or {})
+            prompts.append(scene.prompt.format_map(values))
+        return prompts
+
+
+def compile_template(path: str) -> MemeTemplate:
+    """Parse and validate a meme template YAML file.
+
+    Raises:
+        ValueError: If the template is malformed or uses unknown variables
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+
+    meme_type = data.get("meme_type")
+    if not meme_type:
+        raise ValueError(f"Meme template {path} has no meme_type")
+    total_scenes = int(data.get("total_scenes", 0))
+    if total_scenes < 1:
+        raise ValueError(f"Meme template {path} has no scenes")
+
+    scenes = []
+    for number in range(1, total_scenes + 1):
+        scene = data.get(f"scene_{number}")
+        if not scene or not scene.get("prompt"):
+            raise ValueError(f"Meme template {path} is missing scene_{number} or its prompt")
+
+        inputs = tuple(scene.get("inputs") or ())
+        unknown_inputs = set(inputs) - {INFLUENCER_INPUT, PRODUCT_INPUT}
+        if unknown_inputs:
+            raise ValueError(f"Meme template {path} scene_{number} has unknown inputs: {sorted(unknown_inputs)}")
+
+        declared = set()
+        for input_name in inputs:
+            declared.update(scene.get(f"{input_name}_variables") or ())
+        # Influencer images first: the image prompt applies the product onto the influencer
+        images = [variable for variable in IMAGE_VARIABLES if variable in declared]
+
+        fields = []
+        for _, field, _, _ in string.Formatter().parse(scene["prompt"]):
+            if field is None:
+                continue
+            if field not in TEMPLATE_VARIABLES:
+                raise ValueError(f"Meme template {path} scene_{number} uses unknown variable {{{field}}}")
+            if field not in fields:
+                fields.append(field)
+
+        scenes.append(MemeScene(
+            name=scene.get("name", f"Scene {number}"),
+            inputs=inputs,
+            images=tuple(images),
+            prompt=scene["prompt"],
+            fields=tuple(fields),
+        ))
+    return MemeTemplate(meme_type=str(meme_type), scenes=tuple(scenes), path=path)
+
+
+class MemeLibrary:
+    """Compiled meme templates from ``assets/memes``, keyed by meme type.
+
+    Templates are compiled once, at startup or on first use.
+    """
+
+    def __init__(self, memes_dir: str = MEMES_DIR):
+        self.memes_dir = memes_dir
+        self._templates: Optional[Dict[str, MemeTemplate]] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, MemeTemplate]:
+        """Compile every template in the memes directory.
+
+        Raises:
+            ValueError: If a template is invalid or two templates share a meme type
+        """
+        templates = {}
+        if os.path.isdir(self.memes_dir):
+            for name in sorted(os.listdir(self.memes_dir)):
+                if not name.endswith((".yaml", ".yml")):
+                    continue
+                template = compile_template(os.path.join(self.memes_dir, name))
+                key = template.meme_type.lower()
+                if key in templates:
+                    raise ValueError(f"Duplicate meme type {template.meme_type} in {template.path}")
+                templates[key] = template
+        with self._lock:
+            self._templates = templates
+        return templates
+
+    def _loaded(self) -> Dict[str, MemeTemplate]:
+        with self._lock:
+            templates = self._templates
+        return templates if templates is not None else self.load()
+
+    def get(self, meme_type: str) -> Optional[MemeTemplate]:
+        """Return the template for a meme type (case-insensitive), or None."""
+        return self._loaded().get((meme_type or "").lower())
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Return a summary of the templates for listing in the frontend."""
+        return [
+            {"meme_type": template.meme_type, "scenes": [scene.name for scene in template.scenes]}
+            for template in self._loaded().values()
+        ]
+
+
+meme_library = MemeLibrary()
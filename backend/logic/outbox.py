@@ -0,0 +1,271 @@
+import json
+import os
+import random
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from logic.events import bind_run
+from logic.job_queue import SQLITE_JOURNAL_MODE
+from logic.push_content import PUBLISH_PLATFORMS, PUBLISH_USER, upload_to_platform
+
+
+# Finished videos waiting to be published, and the database tracking them, survive restarts
+OUTBOX_DIR = os.getenv("OUTBOX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "outbox"))
+# Run the outbox worker inside the API process; disable when it runs on its own (python -m logic.outbox)
+OUTBOX_WORKER_ENABLED = os.getenv("OUTBOX_WORKER_ENABLED", "true").lower() in ("1", "true", "yes")
+OUTBOX_MAX_WORKERS = int(os.getenv("OUTBOX_MAX_WORKERS", "4"))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "2"))
+# A post claimed for longer than this is assumed abandoned (e.g. the worker died) and is retried
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "900"))
+# Retry schedule on top of the scheduler's own quick retries: exponential backoff with jitter
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_RETRY_BASE_DELAY = float(os.getenv("OUTBOX_RETRY_BASE_DELAY", "30"))
+OUTBOX_RETRY_MAX_DELAY = float(os.getenv("OUTBOX_RETRY_MAX_DELAY", "3600"))
+
+POST_PENDING = "pending"
+POST_PUBLISHING = "publishing"
+POST_PUBLISHED = "published"
+POST_FAILED = "failed"
+
+
+def outbox_retry_delay(attempts: int) -> float:
+    """Seconds to wait before the next attempt after ``attempts`` failed ones."""
+    delay = min(OUTBOX_RETRY_MAX_DELAY, OUTBOX_RETRY_BASE_DELAY * 2 ** max(0, attempts - 1))
+    return random.uniform(delay / 2, delay)
+
+
+class PublishOutbox:
+    """Durable queue of videos to publish, one post per run and platform.
+
+    Generation workers only copy the finished video into the outbox and
+    record a post per platform; a separate worker uploads due posts and
+    reschedules failed ones with backoff. State lives in SQLite, so pending
+    posts survive restarts, and claims are leases, so several worker
+    processes can share one outbox.
+    """
+
+    def __init__(self, outbox_dir: str = OUTBOX_DIR):
+        self.outbox_dir = outbox_dir
+        self.videos_dir = os.path.join(outbox_dir, "videos")
+        self.path = os.path.join(outbox_dir, "outbox.sqlite3")
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.videos_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS posts ("
+                "id TEXT PRIMARY KEY, run_id TEXT NOT NULL, platform TEXT NOT NULL, video_path TEXT NOT NULL, "
+                "title TEXT, user TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "next_attempt_at REAL NOT NULL, claimed_until REAL, last_error TEXT, response TEXT, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL, UNIQUE (run_id, platform))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS posts_due ON posts (status, next_attempt_at)")
+        return self._conn
+
+    def enqueue(self, run_id: str, video_path: str, title: str,
+                platforms: Optional[List[str]] = None, user: str = PUBLISH_USER) -> List[str]:
+        """Copy a finished video into the outbox and queue a post per platform.
+
+        The copy keeps the video available after the run workspace is swept.
+        Enqueueing a run again does not duplicate its posts.
+
+        Returns:
+            Ids of the queued posts
+        """
+        platforms = list(dict.fromkeys(platforms or PUBLISH_PLATFORMS))
+        stored_path = os.path.join(self.videos_dir, f"{run_id}{os.path.splitext(video_path)[1]}")
+        with self._lock:
+            queued = {row["platform"] for row in self._connect().execute(
+                "SELECT platform FROM posts WHERE run_id = ?", (run_id,)
+            ).fetchall()}
+        # Only new posts need the video; once every post was published, nothing would remove a new copy
+        if any(platform not in queued for platform in platforms):
+            os.makedirs(self.videos_dir, exist_ok=True)
+            try:
+                # A hard link is free when the outbox is on the same filesystem
+                os.link(video_path, stored_path)
+            except FileExistsError:
+                pass
+            except OSError:
+                shutil.copyfile(video_path, stored_path)
+
+        now = time.time()
+        post_ids = []
+        with self._lock:
+            conn = self._connect()
+            for platform in platforms:
+                post_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT OR IGNORE INTO posts (id, run_id, platform, video_path, title, user, status, "
+                    "next_attempt_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (post_id, run_id, platform, stored_path, title, user, POST_PENDING, now, now, now)
+                )
+                post_ids.append(conn.execute(
+                    "SELECT id FROM posts WHERE run_id = ? AND platform = ?", (run_id, platform)
+                ).fetchone()["id"])
+        return post_ids
+
+    def claim(self, limit: int, lease_seconds: float = OUTBOX_LEASE_SECONDS) -> List[Dict[str, Any]]:
+        """Lease up to ``limit`` due posts, including ones whose previous lease expired."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT * FROM posts WHERE (status = ? AND next_attempt_at <= ?) "
+                    "OR (status = ? AND claimed_until < ?) ORDER BY next_attempt_at LIMIT ?",
+                    (POST_PENDING, now, POST_PUBLISHING, now, limit)
+                ).fetchall()
+                for row in rows:
+                    conn.execute(
+                        "UPDATE posts SET status = ?, claimed_until = ?, updated_at = ? WHERE id = ?",
+                        (POST_PUBLISHING, now + lease_seconds, now, row["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [dict(row) for row in rows]
+
+    def complete(self, post_id: str, response: Any):
+        """Mark a post as published."""
+        self._finish(post_id, "status = ?, response = ?, last_error = NULL",
+                     (POST_PUBLISHED, json.dumps(response, default=str)))
+
+    def fail(self, post_id: str, error: str, attempts: int, max_attempts: int = OUTBOX_MAX_ATTEMPTS):
+        """Record a failed attempt; reschedule the post or give up after ``max_attempts``."""
+        if attempts >= max_attempts:
+            self._finish(post_id, "status = ?, last_error = ?", (POST_FAILED, error))
+        else:
+            self._finish(post_id, "status = ?, last_error = ?, next_attempt_at = ?",
+                         (POST_PENDING, error, time.time() + outbox_retry_delay(attempts)))
+
+    def _finish(self, post_id: str, assignments: str, values: tuple):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"UPDATE posts SET {assignments}, attempts = attempts + 1, claimed_until = NULL, updated_at = ? "
+                "WHERE id = ?",
+                values + (time.time(), post_id)
+            )
+            row = conn.execute("SELECT run_id, video_path FROM posts WHERE id = ?", (post_id,)).fetchone()
+            if row is None:
+                return
+            unpublished = conn.execute(
+                "SELECT COUNT(*) FROM posts WHERE run_id = ? AND status != ?", (row["run_id"], POST_PUBLISHED)
+            ).fetchone()[0]
+        if not unpublished:
+            # Every platform has the video; failed posts keep it so they can be retried
+            try:
+                os.remove(row["video_path"])
+            except FileNotFoundError:
+                pass
+
+    def retry(self, post_id: str) -> bool:
+        """Queue a failed post again, e.g. after fixing a platform's credentials.
+
+        Returns:
+            False if the post is unknown, not failed, or its video is gone
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT status, video_path FROM posts WHERE id = ?", (post_id,)).fetchone()
+            if row is None or row["status"] != POST_FAILED or not os.path.exists(row["video_path"]):
+                return False
+            conn.execute(
+                "UPDATE posts SET status = ?, attempts = 0, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                (POST_PENDING, time.time(), time.time(), post_id)
+            )
+        return True
+
+    def get_run(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        """Return the posts of a run, keyed by platform."""
+        with self._lock:
+            rows = self._connect().execute("SELECT * FROM posts WHERE run_id = ?", (run_id,)).fetchall()
+        posts = {}
+        for row in rows:
+            post = {key: row[key] for key in ("id", "status", "attempts", "next_attempt_at", "last_error",
+                                               "created_at", "updated_at")}
+            post["response"] = json.loads(row["response"]) if row["response"] else None
+            posts[row["platform"]] = post
+        return posts
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of posts per status."""
+        counts = {POST_PENDING: 0, POST_PUBLISHING: 0, POST_PUBLISHED: 0, POST_FAILED: 0}
+        with self._lock:
+            for status, count in self._connect().execute(
+                "SELECT status, COUNT(*) FROM posts GROUP BY status"
+            ).fetchall():
+                counts[status] = count
+        return counts
+
+
+def _publish(outbox: PublishOutbox, post: Dict[str, Any]):
+    # Attribute the publish result to the run the video came from
+    with bind_run(post["run_id"]):
+        result = upload_to_platform(post["video_path"], post["title"], post["platform"], post["user"])
+    if result["success"]:
+        outbox.complete(post["id"], result["response"])
+    else:
+        outbox.fail(post["id"], result["error"], post["attempts"] + 1)
+
+
+def start_outbox_worker(outbox: Optional[PublishOutbox] = None,
+                        max_workers: int = OUTBOX_MAX_WORKERS,
+                        poll_interval: float = OUTBOX_POLL_INTERVAL_SECONDS) -> threading.Event:
+    """Drain the outbox on a daemon thread, publishing up to ``max_workers`` posts at once.
+
+    Returns:
+        Event that stops the worker when set
+    """
+    outbox = outbox or publish_outbox
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="publish")
+    in_flight = set()
+    in_flight_lock = threading.Lock()
+
+    def done(future):
+        with in_flight_lock:
+            in_flight.discard(future)
+
+    def loop():
+        while not stop.is_set():
+            try:
+                with in_flight_lock:
+                    free = max_workers - len(in_flight)
+                for post in outbox.claim(free) if free > 0 else []:
+                    future = executor.submit(_publish, outbox, post)
+                    with in_flight_lock:
+                        in_flight.add(future)
+                    future.add_done_callback(done)
+            except Exception as e:
+                print(f"Outbox worker failed: {e}")
+            stop.wait(poll_interval)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    threading.Thread(target=loop, name="outbox-worker", daemon=True).start()
+    return stop
+
+
+publish_outbox = PublishOutbox()
+
+
+if __name__ == "__main__":
+    # Standalone outbox worker, for deployments with OUTBOX_WORKER_ENABLED=false in the API
+    print(f"Publishing from {publish_outbox.path} with {OUTBOX_MAX_WORKERS} workers")
+    try:
+        start_outbox_worker().wait()
+    except KeyboardInterrupt:
+        pass
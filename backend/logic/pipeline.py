@@ -0,0 +1,192 @@
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from logic.events import artifact_url, bind_run, emit_event, record_span, run_events, stage
+from logic.image_prep import read_image_source
+from logic.job_queue import JOB_QUEUED, JOB_RUNNING, JobCancelled, JobLeaseLost, job_queue
+from logic.scene_generator import generate_storyboard_scenes_gemini
+from logic.video_generator import generate_video
+from logic.outbox import publish_outbox
+from logic.run_ledger import (RUN_CANCELLED, RUN_FAILED, RUN_SUCCEEDED, load_checkpoint, run_ledger,
+                              save_checkpoint)
+from logic.workspace import get_workspace_path, run_workspace
+
+# Default for generating every scene's keyframe and all Veo segments in parallel
+PARALLEL_KEYFRAMES = os.getenv("PARALLEL_KEYFRAMES", "false").lower() in ("1", "true", "yes")
+
+
+def _persist_product_image(product_image, output_dir: str) -> Optional[str]:
+    """Keep the product image in the run workspace so the run can be resumed after a restart."""
+    if product_image is None or isinstance(product_image, str):
+        return product_image
+    data = read_image_source(product_image)
+    if not data:
+        return None
+    path = os.path.join(output_dir, "product_image")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def run_generation_pipeline(job_id: str,
+                            product_image,
+                            product_name: str,
+                            brand_name: str,
+                            brand_personality: str,
+                            influencer_name: str,
+                            meme_type: str,
+                            parallel_keyframes: bool = PARALLEL_KEYFRAMES,
+                            refresh_cache: bool = False,
+                            product_data: Optional[Dict[str, Any]] = None,
+                            publish_platforms: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Run the storyboard -> video pipeline for one job and queue the video for publishing.
+
+    This is fully blocking and is meant to be executed on a job queue worker.
+    Parameters and stage outputs are recorded in the run ledger; running a
+    job id again skips the stages it already completed.
+
+    Args:
+        job_id: Id of the job running this pipeline
+        product_image: Product image file path, bytes or file-like object (optional)
+        product_name: Name of the product
+        brand_name: Name of the brand
+        brand_personality: Brand personality description
+        influencer_name: Name of the influencer
+        meme_type: Type of meme/content
+        parallel_keyframes: Generate a keyframe per scene and all Veo segments at once
+        refresh_cache: Bypass and refresh the cached storyboard text
+        product_data: Full product info (e.g. from the catalog) instead of data built from the form fields
+        publish_platforms: Platforms to publish the video to (default: ``PUBLISH_PLATFORMS``)
+
+    Returns:
+        Dictionary with the generated storyboard, artifact paths, the ids of the
+        queued posts and the time spent per stage
+    """
+    with bind_run(job_id), run_workspace(job_id) as output_dir:
+        product_image = _persist_product_image(product_image, output_dir)
+        run_ledger.start(job_id, {
+            "product_image": product_image,
+            "product_name": product_name,
+            "brand_name": brand_name,
+            "brand_personality": brand_personality,
+            "influencer_name": influencer_name,
+            "meme_type": meme_type,
+            "parallel_keyframes": parallel_keyframes,
+            "refresh_cache": refresh_cache,
+            "product_data": product_data,
+            "publish_platforms": publish_platforms,
+        })
+        emit_event("run_started")
+        started = time.perf_counter()
+        try:
+            storyboard = load_checkpoint("storyboard")
+            if storyboard and all(os.path.isfile(path) for path in storyboard["keyframes"]):
+                emit_event("stage_resumed", stage="storyboard")
+                storyboard_items = storyboard["items"]
+                keyframe_paths = storyboard["keyframes"] if parallel_keyframes else None
+                storyboard_image_path = storyboard["keyframes"][0]
+            else:
+                result = generate_storyboard_scenes_gemini(
+                    product_image=product_image,
+                    product_name=product_name,
+                    brand_name=brand_name,
+                    brand_personality=brand_personality,
+                    influencer_name=influencer_name,
+                    meme_type=meme_type,
+                    output_dir=output_dir,
+                    parallel_keyframes=parallel_keyframes,
+                    refresh_cache=refresh_cache,
+                    product_data=product_data
+                )
+                if not result:
+                    raise ValueError(f"Could not generate storyboard for influencer: {influencer_name}")
+                storyboard_items = result[0]
+                if parallel_keyframes:
+                    keyframe_paths = result[1]
+                    storyboard_image_path = keyframe_paths[0]
+                else:
+                    keyframe_paths = None
+                    storyboard_image_path = result[1]
+                save_checkpoint("storyboard", {"items": storyboard_items,
+                                               "keyframes": keyframe_paths or [storyboard_image_path]})
+
+            video_path = generate_video(
+                prompts=storyboard_items,
+                initial_image_path=storyboard_image_path,
+                output_folder=output_dir,
+                keyframe_paths=keyframe_paths
+            )
+
+            with stage("publish") as publish:
+                # Uploads happen on the outbox worker, so this worker is free for the next job
+                post_ids = publish_outbox.enqueue(job_id, video_path, title=meme_type, platforms=publish_platforms)
+                publish["posts"] = post_ids
+        except JobLeaseLost:
+            # Another worker runs the job now and reports its outcome
+            record_span("run", time.perf_counter() - started, "lease_lost")
+            raise
+        except JobCancelled as e:
+            run_ledger.finish(job_id, RUN_CANCELLED)
+            record_span("run", time.perf_counter() - started, "cancelled")
+            emit_event("run_cancelled", error=str(e))
+            raise
+        except Exception as e:
+            run_ledger.finish(job_id, RUN_FAILED)
+            record_span("run", time.perf_counter() - started, "error")
+            emit_event("run_failed", error=str(e))
+            raise
+        run_ledger.finish(job_id, RUN_SUCCEEDED)
+        record_span("run", time.perf_counter() - started)
+        emit_event("run_succeeded", video_url=artifact_url(video_path))
+
+    return {
+        "output_dir": output_dir,
+        "storyboard": storyboard_items,
+        "storyboard_image_path": storyboard_image_path,
+        "keyframe_paths": keyframe_paths,
+        "video_path": video_path,
+        "publish_posts": post_ids,
+        "timings": run_events.timings(job_id),
+    }
+
+
+def queue_generation(job_id: str, product_image=None, **params) -> str:
+    """Queue ``run_generation_pipeline`` for a job.
+
+    The product image is written to the run workspace first, so the job's
+    arguments can be stored in the shared job store and read by a worker
+    on another process or host.
+
+    Args:
+        job_id: Id of the job
+        product_image: Product image file path, bytes or file-like object (optional)
+        **params: Other ``run_generation_pipeline`` arguments
+
+    Returns:
+        The id of the queued job
+    """
+    output_dir = get_workspace_path(job_id)
+    os.makedirs(output_dir, exist_ok=True)
+    product_image = _persist_product_image(product_image, output_dir)
+    return job_queue.submit(run_generation_pipeline, job_id=job_id, product_image=product_image, **params)
+
+
+def resume_run(run_id: str) -> bool:
+    """Queue a recorded run again under its id; completed stages are skipped.
+
+    Returns:
+        False if the run is not in the ledger
+
+    Raises:
+        ValueError: If the run is still queued or running
+    """
+    run = run_ledger.get_run(run_id)
+    if run is None:
+        return False
+    job = job_queue.get(run_id)
+    if job is not None and job["status"] in (JOB_QUEUED, JOB_RUNNING):
+        raise ValueError(f"Run {run_id} is already {job['status']}")
+    run_events.emit(run_id, "run_queued", resumed=True)
+    queue_generation(run_id, **run["params"])
+    return True
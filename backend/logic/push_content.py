@@ -1,19 +1,64 @@
-from upload_post import UploadPostClient
-
 import os
-from dotenv import load_dotenv
+import time
+from typing import Any, Dict
+
+from logic.clients import get_upload_client
+from logic.events import emit_event, record_span
+from logic.upstream import upstream
+
+# Platforms every finished video is published to, e.g. "instagram,tiktok,youtube"
+PUBLISH_PLATFORMS = [platform.strip() for platform in os.getenv("PUBLISH_PLATFORMS", "instagram").split(",")
+                     if platform.strip()]
+PUBLISH_USER = os.getenv("PUBLISH_USER", "angeli")
+# Uploads in flight and started per minute, per platform and across all jobs;
+# override a single platform with e.g. PUBLISH_MAX_CONCURRENCY_TIKTOK
+PUBLISH_MAX_CONCURRENCY = int(os.getenv("PUBLISH_MAX_CONCURRENCY", "2"))
+PUBLISH_REQUESTS_PER_MINUTE = float(os.getenv("PUBLISH_REQUESTS_PER_MINUTE", "30"))
 
-load_dotenv()
-api_key = os.getenv("UPLOAD_POST_API_KEY")
-client = UploadPostClient(api_key=api_key)
 
+def publish_upstream(platform: str) -> str:
+    """Name of the upstream scheduler limits of one publishing platform."""
+    return f"upload-post:{platform}"
 
-async def push_content(video_path:str, title:str):
-    response = client.upload_video(
-    video_path=video_path,
-    title=title,
-    user="angeli",
-    platforms=["instagram"]
+
+for _platform in PUBLISH_PLATFORMS:
+    upstream.configure(
+        publish_upstream(_platform),
+        requests_per_minute=float(os.getenv(f"PUBLISH_REQUESTS_PER_MINUTE_{_platform.upper()}",
+                                            str(PUBLISH_REQUESTS_PER_MINUTE))),
+        max_concurrency=int(os.getenv(f"PUBLISH_MAX_CONCURRENCY_{_platform.upper()}", str(PUBLISH_MAX_CONCURRENCY)))
     )
 
-    return response
\ No newline at end of file
+
+def upload_to_platform(video_path: str, title: str, platform: str, user: str = PUBLISH_USER) -> Dict[str, Any]:
+    """Upload a video to one platform, within its limits and retrying transient errors.
+
+    Blocking; the publish outbox worker runs it on its own threads.
+
+    Returns:
+        Per-platform result with ``success``, ``attempts`` and the upload-post
+        ``response`` or the ``error``
+    """
+    started = time.perf_counter()
+    attempts = 0
+
+    def upload():
+        nonlocal attempts
+        attempts += 1
+        return get_upload_client().upload_video(
+            video_path=video_path,
+            title=title,
+            user=user,
+            platforms=[platform]
+        )
+
+    try:
+        result = {"success": True, "response": upstream.call(publish_upstream(platform), upload)}
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    result["attempts"] = attempts
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    record_span("publish_upload", time.perf_counter() - started, "ok" if result["success"] else "error")
+    emit_event("publish_platform", platform=platform, success=result["success"], error=result.get("error"))
+    return result
+
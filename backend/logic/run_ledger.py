@@ -0,0 +1,138 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from logic.events import current_run, raise_if_lease_lost
+from logic.job_queue import SQLITE_JOURNAL_MODE
+from logic.workspace import ASSETS_DIR
+
+
+# Stage outputs of every run, so a retried or interrupted run resumes where it stopped
+RUN_LEDGER_PATH = os.getenv("RUN_LEDGER_PATH", os.path.join(ASSETS_DIR, "outputs", "run_ledger.sqlite3"))
+# Requeue runs that were in progress when the process stopped
+RUN_RESUME_ON_STARTUP = os.getenv("RUN_RESUME_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+RUN_RUNNING = "running"
+RUN_SUCCEEDED = "succeeded"
+RUN_FAILED = "failed"
+RUN_CANCELLED = "cancelled"
+
+
+class RunLedger:
+    """Parameters and completed stage outputs (checkpoints) of pipeline runs.
+
+    A checkpoint is a JSON value under a key such as ``segment:1``; file
+    paths in checkpoints are only trusted while the file still exists, so a
+    swept workspace simply means the stage runs again.
+    """
+
+    def __init__(self, path: str = RUN_LEDGER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "run_id TEXT PRIMARY KEY, params TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "run_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (run_id, key))"
+            )
+        return self._conn
+
+    def start(self, run_id: str, params: Dict[str, Any]):
+        """Record that a run (or a new attempt of it) started with these parameters."""
+        now = time.time()
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO runs (run_id, params, status, attempts, created_at, updated_at) VALUES (?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT (run_id) DO UPDATE SET params = excluded.params, status = excluded.status, "
+                "attempts = attempts + 1, updated_at = excluded.updated_at",
+                (run_id, json.dumps(params, default=str), RUN_RUNNING, now, now)
+            )
+
+    def finish(self, run_id: str, status: str):
+        with self._lock:
+            self._connect().execute(
+                "UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?", (status, time.time(), run_id)
+            )
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Return a run's status, parameters and checkpoint keys, or None if unknown."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT params, status, attempts, created_at, updated_at FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            keys = [key for (key,) in conn.execute(
+                "SELECT key FROM checkpoints WHERE run_id = ? ORDER BY created_at", (run_id,)
+            ).fetchall()]
+        if row is None:
+            return None
+        return {
+            "run_id": run_id,
+            "params": json.loads(row[0]),
+            "status": row[1],
+            "attempts": row[2],
+            "created_at": row[3],
+            "updated_at": row[4],
+            "checkpoints": keys,
+        }
+
+    def interrupted(self) -> List[str]:
+        """Ids of runs still marked as running, e.g. after the process was killed."""
+        with self._lock:
+            rows = self._connect().execute("SELECT run_id FROM runs WHERE status = ?", (RUN_RUNNING,)).fetchall()
+        return [run_id for (run_id,) in rows]
+
+    def set(self, run_id: str, key: str, value: Any):
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, key, value, created_at) VALUES (?, ?, ?, ?)",
+                (run_id, key, json.dumps(value), time.time())
+            )
+
+    def get(self, run_id: str, key: str) -> Any:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value FROM checkpoints WHERE run_id = ? AND key = ?", (run_id, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+run_ledger = RunLedger()
+
+
+def save_checkpoint(key: str, value: Any):
+    """Record a completed stage output for the current run; a no-op outside of a run.
+
+    Raises:
+        RunLeaseLost: If another worker took over the run's job
+    """
+    raise_if_lease_lost(f"checkpoint {key}")
+    run_id = current_run()
+    if run_id is not None:
+        run_ledger.set(run_id, key, value)
+
+
+def load_checkpoint(key: str) -> Any:
+    """Return a checkpoint of the current run, or None."""
+    run_id = current_run()
+    return run_ledger.get(run_id, key) if run_id is not None else None
+
+
+def completed_file(key: str) -> Optional[str]:
+    """Return the file recorded under ``key`` for the current run if it still exists."""
+    path = load_checkpoint(key)
+    return path if isinstance(path, str) and os.path.isfile(path) else None
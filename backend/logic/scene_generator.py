@@ -1,13 +1,24 @@
 # 이미지 종류는 이것이것이것 중에서 사용할수 있다.
 
+import contextvars
+import json
 import os
-import yaml
+import time
 import base64
-from typing import List, Dict, Any
-from google import genai
-from google.genai import types
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Iterable, List, Dict, Any
 import PIL.Image
+from pydantic import BaseModel
 from dotenv import load_dotenv
+from logic.clients import get_genai_client
+from logic.events import artifact_url, emit_event, record_span, span, stage
+from logic.json_stream import JsonArrayStream
+from logic.image_prep import PreparedImage, prepare_image
+from logic.catalog import INFLUENCERS, PRODUCTS, catalog
+from logic.memes import IMAGE_VARIABLES, INFLUENCER_INPUT, meme_library
+from logic.upstream import GEMINI_MAX_CONCURRENCY, GEMINI_REQUESTS_PER_MINUTE, upstream
+from logic.cache import CACHE_DIR, BlobCache, DiskCache, make_cache_key
 
 # Load environment variables from .env file
 load_dotenv()
@@ -29,16 +40,7 @@ def load_influencer_info(influencer_name: str) -> Dict[str, Any]:
         FileNotFoundError: If influencer info file doesn't exist
         ValueError: If influencer name is invalid
     """
-    influencers_dir = os.path.join(ASSETS_DIR, "influencers")
-    influencer_path = os.path.join(influencers_dir, influencer_name.lower(), "info.yaml")
-    
-    if not os.path.exists(influencer_path):
-        raise FileNotFoundError(f"Influencer info not found at: {influencer_path}")
-    
-    with open(influencer_path, 'r', encoding='utf-8') as f:
-        influencer_data = yaml.safe_load(f)
-    
-    return influencer_data
+    return catalog.get_info(INFLUENCERS, influencer_name)
 
 
 def get_influencer_image_path(influencer_name: str, image_type: str = "full_body") -> str:
@@ -54,10 +56,16 @@ def get_influencer_image_path(influencer_name: str, image_type: str = "full_body
     influencers_dir = os.path.join(ASSETS_DIR, "influencers")
     image_path = os.path.join(influencers_dir, influencer_name.lower(), "images", f"{image_type}.png")
     
-    if not os.path.exists(image_path):
+    try:
+        return catalog.get_image_entry(image_path)["path"]
+    except FileNotFoundError:
         raise FileNotFoundError(f"Influencer image not found at: {image_path}")
-    
-    return image_path
+
+
+def prepare_influencer_image(influencer_name: str, image_type: str = "full_body") -> PreparedImage:
+    """Prepare an influencer image for Gemini; raw bytes and digest come from the asset catalog."""
+    entry = catalog.get_image_entry(get_influencer_image_path(influencer_name, image_type))
+    return prepare_image(entry["bytes"], source_sha256=entry["sha256"])
 
 
 def load_product_info(product_name: str) -> Dict[str, Any]:
@@ -72,16 +80,7 @@ def load_product_info(product_name: str) -> Dict[str, Any]:
     Raises:
         FileNotFoundError: If product info file doesn't exist
     """
-    products_dir = os.path.join(ASSETS_DIR, "products")
-    product_path = os.path.join(products_dir, product_name.lower(), "info.yaml")
-    
-    if not os.path.exists(product_path):
-        raise FileNotFoundError(f"Product info not found at: {product_path}")
-    
-    with open(product_path, 'r', encoding='utf-8') as f:
-        product_data = yaml.safe_load(f)
-    
-    return product_data
+    return catalog.get_info(PRODUCTS, product_name)
 
 
 def get_product_image_path(product_name: str, image_name: str = None) -> str:
@@ -109,10 +108,10 @@ def get_product_image_path(product_name: str, image_name: str = None) -> str:
         else:
             raise FileNotFoundError(f"No product image found in: {product_images_dir}")
     
-    if not os.path.exists(image_path):
+    try:
+        return catalog.get_image_entry(image_path)["path"]
+    except FileNotFoundError:
         raise FileNotFoundError(f"Product image not found at: {image_path}")
-    
-    return image_path
 
 
 def create_product_data_from_form(product_name: str, brand_name: str, brand_personality: str, meme_type: str) -> Dict[str, Any]:
@@ -246,8 +245,217 @@ IMPORTANT:
 
 
 """
-# Get GENAI_API_KEY from environment variables
-GENAI_API_KEY = os.getenv("GENAI_API_KEY")
+
+# Used for scenes that only send a single (influencer) image
+SINGLE_IMAGE_GENERATION_PROMPT = """
+Create a scene image featuring the person in the given image with below information: 
+
+{storyboard_item}
+
+IMPORTANT:
+1. NOT TO INCLUDE ANY TEXT IN IMAGE.
+"""
+STORYBOARD_MODEL = "gemini-2.0-flash-exp"
+upstream.configure(
+    STORYBOARD_MODEL,
+    requests_per_minute=float(os.getenv("STORYBOARD_MODEL_RPM", str(GEMINI_REQUESTS_PER_MINUTE))),
+    max_concurrency=int(os.getenv("STORYBOARD_MODEL_MAX_CONCURRENCY", str(GEMINI_MAX_CONCURRENCY)))
+)
+# Storyboard scenes (JSON), keyed by (model, prompt hash)
+STORYBOARD_CACHE_TTL_SECONDS = float(os.getenv("STORYBOARD_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+STORYBOARD_CACHE_MAX_ENTRIES = int(os.getenv("STORYBOARD_CACHE_MAX_ENTRIES", "1000"))
+storyboard_cache = DiskCache(
+    os.path.join(CACHE_DIR, "storyboards.sqlite3"),
+    ttl_seconds=STORYBOARD_CACHE_TTL_SECONDS,
+    max_entries=STORYBOARD_CACHE_MAX_ENTRIES,
+    max_bytes=64 * 1024 ** 2
+)
+# Storyboards are requested as structured output with exactly this many scenes
+STORYBOARD_SCENE_COUNT = 3
+@lru_cache(maxsize=None)
+def storyboard_schema():
+    """Response schema of the storyboard: an array of exactly ``STORYBOARD_SCENE_COUNT`` scenes."""
+    # google.genai is imported on first use; it is slow to import and not needed to serve the API
+    from google.genai import types
+    return types.Schema(
+        type=types.Type.ARRAY,
+        min_items=STORYBOARD_SCENE_COUNT,
+        max_items=STORYBOARD_SCENE_COUNT,
+        items=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "description": types.Schema(type=types.Type.STRING, description="Scene description (background, character positions)"),
+                "expression": types.Schema(type=types.Type.STRING, description="Character expressions/poses"),
+                "effects": types.Schema(type=types.Type.STRING, description="Visual effects or points of emphasis"),
+            },
+            required=["description", "expression", "effects"],
+            property_ordering=["description", "expression", "effects"],
+        ),
+    )
+
+
+class StoryboardScene(BaseModel):
+    """One scene of a structured storyboard."""
+    description: str
+    expression: str
+    effects: str
+
+
+class StoryboardStreamError(RuntimeError):
+    """Raised when the storyboard stream breaks after scenes were already handed out."""
+
+
+def format_scene(index: int, scene: StoryboardScene) -> str:
+    """Render a scene as the text prompt used for its keyframe and video segment."""
+    return (f"{index + 1}: Description: {scene.description} "
+            f"Character Expression: {scene.expression} Visual Effects: {scene.effects}")
+
+
+def create_storyboard_prompt(influencer_data: Dict[str, Any], product_data: Dict[str, Any], influencer_name: str) -> str:
+    """Create the full prompt for a structured storyboard of ``STORYBOARD_SCENE_COUNT`` scenes."""
+    # Create personalized storyboard prompt with product context
+    personalized_system_prompt = create_personalized_storyboard_prompt(influencer_data, product_data)
+    return f"""
+    {personalized_system_prompt}
+    
+    {STORYBOARD_OUTPUT_INSTRUCTION}
+    
+    Return exactly {STORYBOARD_SCENE_COUNT} scenes, in order. For each scene give:
+    description: scene description that fits {influencer_data.get('influencer', {}).get('name', influencer_name)}'s style
+    expression: character expression matching their personality
+    effects: visual effects that align with their brand aesthetic
+    """
+
+
+def stream_storyboard_scenes(client, storyboard_prompt: str,
+                             on_scene: Callable[[StoryboardScene], None]) -> List[StoryboardScene]:
+    """Stream a structured storyboard, handing out each scene once it is complete.
+
+    Args:
+        client: genai client
+        storyboard_prompt: Storyboard prompt
+        on_scene: Called with each validated scene as soon as it has arrived
+
+    Returns:
+        All scenes, in order
+
+    Raises:
+        StoryboardStreamError: If the stream fails after ``on_scene`` was called;
+            errors before the first scene are raised as-is so they can be retried
+    """
+    from google.genai import types
+
+    parser = JsonArrayStream()
+    scenes = []
+    try:
+        for chunk in client.models.generate_content_stream(
+            model=STORYBOARD_MODEL,
+            contents=storyboard_prompt,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=storyboard_schema()
+            )
+        ):
+            for element in parser.feed(chunk.text or ""):
+                scene = StoryboardScene.model_validate(element)
+                scenes.append(scene)
+                on_scene(scene)
+        parser.close()
+    except Exception as e:
+        if scenes:
+            # Not chained to ``e``: the upstream scheduler would find a retryable cause and stream
+            # again, handing out the scenes already passed to ``on_scene`` a second time
+            raise StoryboardStreamError(
+                f"Storyboard stream failed after {len(scenes)} scenes: {type(e).__name__}: {e}") from None
+        raise
+    return scenes
+
+
+IMAGE_MODEL = "gemini-2.0-flash-preview-image-generation"
+upstream.configure(
+    IMAGE_MODEL,
+    requests_per_minute=float(os.getenv("IMAGE_MODEL_RPM", str(GEMINI_REQUESTS_PER_MINUTE))),
+    max_concurrency=int(os.getenv("IMAGE_MODEL_MAX_CONCURRENCY", str(GEMINI_MAX_CONCURRENCY)))
+)
+# Generated scene images, keyed by (model, rendered prompt, input image hashes)
+SCENE_IMAGE_CACHE_TTL_SECONDS = float(os.getenv("SCENE_IMAGE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+SCENE_IMAGE_CACHE_MAX_BYTES = int(os.getenv("SCENE_IMAGE_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+scene_image_cache = BlobCache(
+    os.path.join(CACHE_DIR, "scene_images"),
+    ttl_seconds=SCENE_IMAGE_CACHE_TTL_SECONDS,
+    max_entries=100000,
+    max_bytes=SCENE_IMAGE_CACHE_MAX_BYTES
+)
+# Maximum number of scene images generated at once in parallel keyframe mode
+KEYFRAME_MAX_PARALLEL = int(os.getenv("KEYFRAME_MAX_PARALLEL", "3"))
+
+
+def generate_scene_image(client, storyboard_item: str, images: List[PreparedImage],
+                         output_path: str, use_cache: bool = True, scene: int = 0):
+    """Generate the start image of one storyboard scene.
+
+    Args:
+        client: genai client
+        storyboard_item: Scene description
+        images: Prepared input images, influencer first and product second
+        output_path: Where to save the generated image
+        use_cache: Look up and store the result in the scene image cache
+        scene: Index of the scene, used for progress events
+
+    Returns:
+        Path to the saved image, or None if no image was generated
+    """
+    from google.genai import types
+
+    # Generate scene image using Gemini with image generation capability
+    prompt_template = IMAGE_GENERATION_PROMPT if len(images) > 1 else SINGLE_IMAGE_GENERATION_PROMPT
+    image_prompt = prompt_template.format(
+        storyboard_item=storyboard_item
+    )
+
+    with stage("keyframe", scene=scene) as keyframe:
+        cache_key = None
+        if use_cache:
+            cache_key = make_cache_key(IMAGE_MODEL, image_prompt, *(image.sha256 for image in images))
+            cached = scene_image_cache.get(cache_key)
+            if cached is not None:
+                with open(output_path, "wb") as f:
+                    f.write(cached)
+                print(f"Saved cached image: {os.path.basename(output_path)}")
+                keyframe.update(cached=True, artifact_url=artifact_url(output_path))
+                return output_path
+
+        try:
+            # Use Gemini's multimodal generation with image output
+            with span("image_generation"):
+                img_result = upstream.call(
+                    IMAGE_MODEL,
+                    client.models.generate_content,
+                    model=IMAGE_MODEL,
+                    contents=[image_prompt] + [
+                        types.Part.from_bytes(data=image.data, mime_type=image.mime_type) for image in images
+                    ],
+                    config=types.GenerateContentConfig(
+                        response_modalities=['TEXT', 'IMAGE']
+                    )
+                )
+
+            # Process the generated images
+            for part in img_result.candidates[0].content.parts:
+                if part.inline_data:
+                    # Save the generated image
+                    with open(output_path, "wb") as f:
+                        f.write(part.inline_data.data)
+                    if cache_key is not None:
+                        scene_image_cache.set(cache_key, part.inline_data.data)
+                    print(f"Saved image: {os.path.basename(output_path)}")
+                    keyframe.update(cached=False, artifact_url=artifact_url(output_path))
+                    return output_path
+
+        except Exception as e:
+            print(f"Error generating image for {os.path.basename(output_path)}: {e}")
+            keyframe["error"] = str(e)
+    return None
 
 
 def generate_storyboard_scenes_gemini(product_image,
@@ -255,7 +463,11 @@ def generate_storyboard_scenes_gemini(product_image,
                                       brand_name: str,
                                       brand_personality: str,
                                       influencer_name: str,
-                                      meme_type: str):
+                                      meme_type: str,
+                                      output_dir: str = None,
+                                      parallel_keyframes: bool = False,
+                                      refresh_cache: bool = False,
+                                      product_data: Dict[str, Any] = None):
     """Generate storyboard scenes and create images using Gemini.
     
     Args:
@@ -265,136 +477,141 @@ def generate_storyboard_scenes_gemini(product_image,
         brand_personality: Personality traits of the brand
         influencer_name: Name of the influencer
         meme_type: Type of meme to generate
+        output_dir: Directory for the storyboard outputs (default: outputs/<product>/<influencer>)
+        parallel_keyframes: Generate a start image for every scene instead of only the first
+        refresh_cache: Skip the storyboard cache lookup and overwrite the cached storyboard
+        product_data: Product information (e.g. from the catalog); built from the form fields if None
+
+    Returns:
+        Tuple of (storyboard items, storyboard image path), or (storyboard items,
+        keyframe paths) when ``parallel_keyframes`` is set
+
+    Raises:
+        ValueError: If a keyframe (in chained mode, the first one) could not be generated
     """
     
     # Load influencer information (still needed for image)
     try:
         influencer_data = load_influencer_info(influencer_name)
-        influencer_image_path = get_influencer_image_path(influencer_name, "full_body")
+        influencer_img = prepare_influencer_image(influencer_name, "full_body")
     except (FileNotFoundError, ValueError) as e:
         print(f"Error loading influencer data: {e}")
         return
     
     # Create product data from form parameters
-    product_data = create_product_data_from_form(product_name, brand_name, brand_personality, meme_type)
+    if product_data is None:
+        product_data = create_product_data_from_form(product_name, brand_name, brand_personality, meme_type)
     
-    # Check if API key is available
-    if not GENAI_API_KEY:
-        raise ValueError("GENAI_API_KEY is not set in environment variables. Please check your .env file.")
-    
-    client = genai.Client(api_key=GENAI_API_KEY)
+    client = get_genai_client()
 
-    # Create personalized storyboard prompt with product context
-    personalized_system_prompt = create_personalized_storyboard_prompt(influencer_data, product_data)
-    
-    # Generate storyboard using Gemini text generation with full context
-    context_prompt = f"""
-Product: {product_data.get('product', {}).get('name', product_name)} ({product_data.get('product', {}).get('category', '')})
-Influencer: {influencer_data.get('influencer', {}).get('name', influencer_name)}
-
-Key Product Features to Highlight: {', '.join(product_data.get('features', {}).get('key_features', [])[:3])}
-Suggested Content Angles: {', '.join(list(product_data.get('content_themes', {}).get('lifestyle', []))[:2])}
-Viral Opportunity: {', '.join(product_data.get('viral_potential', {}).get('trends', [])[:2])}
-
-Create a storyboard that:
-- Showcases {product_name} authentically through {influencer_data.get('influencer', {}).get('name', influencer_name)}'s lens
-- Incorporates their content expertise: {', '.join(influencer_data.get('content_focus', []))}
-- Leverages current trends and viral potential
-- Feels natural to their established style and audience
-"""
-    
-    storyboard_prompt = f"""
-    {personalized_system_prompt}
-    
-    {STORYBOARD_OUTPUT_INSTRUCTION}
-    
-    Please format each scene like this:
-    SCENE 1:
-    Description: [scene description that fits {influencer_data.get('influencer', {}).get('name', influencer_name)}'s style]
-    Character Expression: [expression matching their personality]
-    Visual Effects: [visual effects that align with their brand aesthetic]
-    
-    SCENE 2:
-    Description: [scene description that fits {influencer_data.get('influencer', {}).get('name', influencer_name)}'s style]
-    Character Expression: [expression matching their personality]
-    Visual Effects: [visual effects that align with their brand aesthetic]
-    """
-    
-    response = client.models.generate_content(
-        model="gemini-2.0-flash-exp",
-        contents=storyboard_prompt
-    )
-    
-    # Parse the plain text response
-    storyboard_items = []
-    scenes = response.text.split('SCENE ')[1:]  # Skip empty first element
-    for scene in scenes:
-        lines = scene.strip().replace("\n", "")
-        storyboard_items.append(lines)
-
-    # Load images for Gemini
-    # Handle product image - can be a file path, None, or PIL Image
-    if product_image:
-        if isinstance(product_image, str):
-            # It's a file path
-            product_img = PIL.Image.open(product_image)
-        elif isinstance(product_image, PIL.Image.Image):
-            # It's already a PIL Image
-            product_img = product_image
-        else:
-            # Try to open it as a file-like object
-            product_img = PIL.Image.open(product_image)
+    # Meme types with a template in assets/memes get their scenes from it instead of the storyboard LLM
+    template = meme_library.get(meme_type)
+
+    prompt_started = time.perf_counter()
+    if template is not None:
+        template_prompts = template.render(influencer_data, product_data)
     else:
-        # No product image provided, create a placeholder or skip
-        # For now, we'll create a simple placeholder image
-        product_img = PIL.Image.new('RGB', (512, 512), color='white')
+        storyboard_prompt = create_storyboard_prompt(influencer_data, product_data, influencer_name)
+    record_span("prompt_build", time.perf_counter() - prompt_started)
     
-    influencer_img = PIL.Image.open(influencer_image_path)
-
     # Create output directory if it doesn't exist
-    output_dir = os.path.join(ASSETS_DIR, "outputs", product_name, influencer_name)
+    if output_dir is None:
+        output_dir = os.path.join(ASSETS_DIR, "outputs", product_name, influencer_name)
     os.makedirs(output_dir, exist_ok=True)
 
-    # save storyboard text into file
-    with open(os.path.join(output_dir, "storyboard.txt"), "w") as f:
-        f.write("\n".join(storyboard_items))
-
-    for i, storyboard_item in enumerate(storyboard_items):
-        print("Description: ", storyboard_item)
+    # Prepare images for Gemini up front so keyframes can start while the storyboard streams in
+    # Handle product image - can be a file path, bytes, file-like object, PIL Image or None
+    product_img = prepare_image(product_image) if product_image else None
+
+    def template_scene_images(variables: Iterable[str]) -> List[PreparedImage]:
+        # Only the declared images; product images are skipped when none was given
+        images = []
+        for variable in variables:
+            input_name, image_type = IMAGE_VARIABLES[variable]
+            if input_name == INFLUENCER_INPUT:
+                images.append(influencer_img if image_type == "full_body"
+                              else prepare_influencer_image(influencer_name, image_type))
+            elif product_img is not None:
+                images.append(product_img)
+        return images or [influencer_img]
+
+    if template is None and product_img is None:
+        # No product image provided, use a simple placeholder image
+        product_img = prepare_image(PIL.Image.new('RGB', (512, 512), color='white'))
+
+    # A scene's keyframe starts as soon as the scene arrives: every scene in parallel
+    # keyframe mode, otherwise only the first (later segments continue from the previous one)
+    executor = ThreadPoolExecutor(max_workers=max(1, KEYFRAME_MAX_PARALLEL if parallel_keyframes else 1))
+    keyframe_futures = {}
+    storyboard_items = []
 
-        # Generate scene image using Gemini with image generation capability
-        image_prompt = IMAGE_GENERATION_PROMPT.format(
-            storyboard_item=storyboard_item
+    def start_scene(storyboard_item: str, images: List[PreparedImage]):
+        index = len(storyboard_items)
+        storyboard_items.append(storyboard_item)
+        emit_event("storyboard_scene", scene=index, text=storyboard_item)
+        if parallel_keyframes:
+            output_path = os.path.join(output_dir, f"storyboard_{index}.png")
+        elif index == 0:
+            output_path = os.path.join(output_dir, "storyboard.png")
+        else:
+            return
+        # Each task runs in a copy of the current context so its events are attributed to this run
+        keyframe_futures[index] = executor.submit(
+            contextvars.copy_context().run, generate_scene_image,
+            client, storyboard_item, images, output_path, scene=index
         )
-        try:
-            # Use Gemini's multimodal generation with image output
-            img_result = client.models.generate_content(
-                model="gemini-2.0-flash-preview-image-generation",
-                contents=[
-                    image_prompt,
-                    influencer_img,
-                    product_img
-                ],
-                config=types.GenerateContentConfig(
-                    response_modalities=['TEXT', 'IMAGE']
-                )
-            )
-            
-            # Process the generated images
-            for j, part in enumerate(img_result.candidates[0].content.parts):
-                if part.inline_data:
-                    # Save the generated image
-                    image_data = part.inline_data.data
-                    with open(f"{output_dir}/storyboard.png", "wb") as f:
-                        f.write(image_data)
-                    print(f"Saved image: storyboard.png")
-                    break
-                    
-        except Exception as e:
-            print(f"Error generating image for scene {i+1}: {e}")
-        break
 
-    return storyboard_items, os.path.join(output_dir, "storyboard.png")
+    def start_storyboard_scene(scene: StoryboardScene):
+        start_scene(format_scene(len(storyboard_items), scene), [influencer_img, product_img])
+
+    try:
+        with stage("storyboard") as storyboard:
+            if template is not None:
+                # Chained mode only generates the first keyframe and every later segment continues
+                # from it, so it gets all the images the template uses (notably the product)
+                template_images = [variable for variable in IMAGE_VARIABLES
+                                   if any(variable in scene.images for scene in template.scenes)]
+                for index, (scene, prompt) in enumerate(zip(template.scenes, template_prompts)):
+                    start_scene(f"{index + 1}: {prompt}",
+                                template_scene_images(scene.images if parallel_keyframes else template_images))
+                cached = None
+            else:
+                # Identical prompts are answered from the disk cache unless a refresh is requested
+                cache_key = make_cache_key(STORYBOARD_MODEL, storyboard_prompt)
+                cached = None if refresh_cache else storyboard_cache.get(cache_key)
+                if cached is not None:
+                    scenes = [StoryboardScene.model_validate(scene) for scene in json.loads(cached)]
+                    for scene in scenes:
+                        start_storyboard_scene(scene)
+                else:
+                    with span("storyboard_llm"):
+                        scenes = upstream.call(STORYBOARD_MODEL, stream_storyboard_scenes,
+                                               client, storyboard_prompt, start_storyboard_scene)
+                if len(scenes) != STORYBOARD_SCENE_COUNT:
+                    raise ValueError(f"Storyboard has {len(scenes)} scenes, expected {STORYBOARD_SCENE_COUNT}")
+                if cached is None:
+                    storyboard_cache.set(cache_key, json.dumps([scene.model_dump() for scene in scenes]).encode("utf-8"))
+
+            # save storyboard text into file
+            storyboard_path = os.path.join(output_dir, "storyboard.txt")
+            with open(storyboard_path, "w") as f:
+                f.write("\n".join(storyboard_items))
+            storyboard.update(cached=cached is not None, scenes=storyboard_items,
+                              template=template.meme_type if template is not None else None,
+                              artifact_url=artifact_url(storyboard_path))
+
+        keyframe_paths = [keyframe_futures[i].result() for i in sorted(keyframe_futures)]
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    # Chained mode only has the first scene's keyframe
+    missing = [i + 1 for i, path in enumerate(keyframe_paths) if path is None]
+    if missing:
+        raise ValueError(f"Could not generate keyframes for scenes: {missing}")
+    if parallel_keyframes:
+        return storyboard_items, keyframe_paths
+
+    return storyboard_items, keyframe_paths[0]
 
 
 if __name__ == "__main__":
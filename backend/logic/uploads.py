@@ -0,0 +1,119 @@
+import os
+from typing import BinaryIO
+
+from fastapi import HTTPException, UploadFile
+from PIL import ImageFile
+
+
+# Uploads larger than this are rejected
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 ** 2)))
+# Multipart request bodies larger than this are rejected while they arrive; a batch carries several images
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(64 * 1024 ** 2)))
+# Images with a larger width or height are rejected
+UPLOAD_MAX_DIMENSION = int(os.getenv("UPLOAD_MAX_DIMENSION", "8192"))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+ALLOWED_IMAGE_TYPES = {
+    "image/png": "PNG",
+    "image/jpeg": "JPEG",
+    "image/webp": "WEBP",
+}
+
+
+class UploadRejected(ValueError):
+    """Raised when an upload fails validation; carries the HTTP status to return."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadSizeLimitMiddleware:
+    """Reject multipart request bodies over ``max_bytes`` before the form is parsed.
+
+    Starlette spools the whole form before a handler sees its files, so the
+    limit has to apply to the request body: a larger ``Content-Length`` is
+    answered with 413 without reading the body, and a body sent without one
+    is cut off as soon as it passes the limit.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/"):
+            return await self.app(scope, receive, send)
+
+        detail = f"Request body exceeds {self.max_bytes} bytes"
+        content_length = headers.get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            await send({"type": "http.response.start", "status": 413,
+                        "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"connection", b"close")]})
+            await send({"type": "http.response.body", "body": detail.encode()})
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing as they are
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def ingest_image_upload(upload: UploadFile,
+                              max_bytes: int = UPLOAD_MAX_BYTES,
+                              max_dimension: int = UPLOAD_MAX_DIMENSION) -> BinaryIO:
+    """Validate an uploaded image in the file Starlette spooled it to.
+
+    The request body was already capped by ``UploadSizeLimitMiddleware``
+    while it arrived; here the declared content type and the file size are
+    checked, then the image header is parsed from the first chunks so bad
+    formats and dimensions are rejected without reading the rest.
+
+    Args:
+        upload: Uploaded file
+        max_bytes: Maximum upload size
+        max_dimension: Maximum image width/height in pixels
+
+    Returns:
+        The upload's file positioned at the start; the caller must close it
+
+    Raises:
+        UploadRejected: If the upload is not an acceptable image
+    """
+    if upload.content_type not in ALLOWED_IMAGE_TYPES:
+        raise UploadRejected(f"Unsupported product image type: {upload.content_type}", 415)
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadRejected(f"Product image exceeds {max_bytes} bytes", 413)
+
+    parser = ImageFile.Parser()
+    try:
+        while parser.image is None:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                raise UploadRejected("Product image is empty or not a valid image")
+            try:
+                parser.feed(chunk)
+            except Exception:
+                raise UploadRejected("Product image could not be parsed")
+        image = parser.image
+        if image.format not in ALLOWED_IMAGE_TYPES.values():
+            raise UploadRejected(f"Unsupported product image format: {image.format}", 415)
+        if max(image.size) > max_dimension:
+            raise UploadRejected(f"Product image dimensions {image.size} exceed {max_dimension}px")
+        await upload.seek(0)
+        return upload.file
+    except BaseException:
+        await upload.close()
+        raise
@@ -0,0 +1,252 @@
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+from logic.events import emit_event
+
+
+# Defaults for upstreams that are not configured explicitly
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60"))
+VEO_MAX_CONCURRENCY = int(os.getenv("VEO_MAX_CONCURRENCY", "4"))
+VEO_REQUESTS_PER_MINUTE = float(os.getenv("VEO_REQUESTS_PER_MINUTE", "10"))
+UPSTREAM_DEFAULT_MAX_CONCURRENCY = int(os.getenv("UPSTREAM_DEFAULT_MAX_CONCURRENCY", "4"))
+UPSTREAM_DEFAULT_REQUESTS_PER_MINUTE = float(os.getenv("UPSTREAM_DEFAULT_REQUESTS_PER_MINUTE", "60"))
+
+# Retry schedule for rate-limited and transient errors: full jitter over an exponential backoff
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "5"))
+UPSTREAM_RETRY_BASE_DELAY = float(os.getenv("UPSTREAM_RETRY_BASE_DELAY", "1"))
+UPSTREAM_RETRY_MAX_DELAY = float(os.getenv("UPSTREAM_RETRY_MAX_DELAY", "60"))
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def _loaded(module: str):
+    # Error types are only looked up in libraries that are already imported: an
+    # error cannot come from a library that was never loaded, and importing
+    # google.genai, httpx or requests here would slow down startup
+    return sys.modules.get(module)
+
+
+def _genai_api_error(error: BaseException) -> bool:
+    errors = _loaded("google.genai.errors")
+    return errors is not None and isinstance(error, errors.APIError)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an upstream error is worth retrying (rate limits, 5xx, network errors)."""
+    if _genai_api_error(error):
+        return error.code in RETRYABLE_STATUS_CODES
+    requests = _loaded("requests")
+    if requests is not None and isinstance(error, requests.RequestException):
+        if error.response is not None:
+            return error.response.status_code in RETRYABLE_STATUS_CODES
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+    httpx = _loaded("httpx")
+    if httpx is not None and isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (ConnectionError, TimeoutError)) or (httpx is not None and isinstance(error, httpx.TransportError)):
+        return True
+    # Client libraries such as upload-post wrap the underlying HTTP error
+    return error.__cause__ is not None and is_retryable(error.__cause__)
+
+
+def retry_delay(attempt: int,
+                base_delay: float = UPSTREAM_RETRY_BASE_DELAY,
+                max_delay: float = UPSTREAM_RETRY_MAX_DELAY) -> float:
+    """Seconds to wait before retry number ``attempt`` (starting at 0)."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class UpstreamLimiter:
+    """Request-rate and concurrency limits of one upstream model.
+
+    Requests draw from a token bucket refilled at ``requests_per_minute``;
+    tokens are reserved in arrival order, so callers wait their turn instead
+    of racing. Concurrency is a plain semaphore, which long-running
+    operations can hold beyond the request that started them.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, max_concurrency: int):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrency = max_concurrency
+        self._rate = requests_per_minute / 60
+        self._burst = max(1, max_concurrency)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+
+    def reserve(self) -> float:
+        """Take a request token; returns the seconds to wait before using it."""
+        with self._lock:
+            self.requests += 1
+            if self._rate <= 0:
+                return 0.0
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self._rate
+
+    def throttle(self):
+        """Wait for a request token on the calling thread."""
+        delay = self.reserve()
+        if delay > 0:
+            self._count("waiting", 1)
+            try:
+                time.sleep(delay)
+            finally:
+                self._count("waiting", -1)
+
+    async def throttle_async(self):
+        """Wait for a request token without blocking the event loop."""
+        delay = self.reserve()
+        if delay > 0:
+            self._count("waiting", 1)
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self._count("waiting", -1)
+
+    def rate_limited(self):
+        """Drop the accumulated burst after a 429 so queued callers slow down too."""
+        with self._lock:
+            self.throttled += 1
+            self._tokens = min(self._tokens, 0.0)
+
+    def acquire_slot(self):
+        """Block until a concurrency slot is free and take it."""
+        if not self._slots.acquire(blocking=False):
+            self._count("waiting", 1)
+            try:
+                self._slots.acquire()
+            finally:
+                self._count("waiting", -1)
+        self._count("in_flight", 1)
+
+    def release_slot(self):
+        self._count("in_flight", -1)
+        self._slots.release()
+
+    def _count(self, field: str, delta: int):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + delta)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "max_concurrency": self.max_concurrency,
+                "waiting": self.waiting,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "failures": self.failures,
+            }
+
+
+class UpstreamScheduler:
+    """Central gate for every Gemini and Veo API call.
+
+    Each model gets its own ``UpstreamLimiter``. ``call`` waits for a
+    concurrency slot and a request token, then retries rate-limited and
+    transient failures with exponential backoff and full jitter.
+    """
+
+    def __init__(self,
+                 max_retries: int = UPSTREAM_MAX_RETRIES,
+                 base_delay: float = UPSTREAM_RETRY_BASE_DELAY,
+                 max_delay: float = UPSTREAM_RETRY_MAX_DELAY):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._limiters: Dict[str, UpstreamLimiter] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, name: str, requests_per_minute: float, max_concurrency: int) -> UpstreamLimiter:
+        """Set the limits of an upstream (usually a model id)."""
+        limiter = UpstreamLimiter(name, requests_per_minute, max_concurrency)
+        with self._lock:
+            self._limiters[name] = limiter
+        return limiter
+
+    def limiter(self, name: str) -> UpstreamLimiter:
+        """Return the limiter of an upstream, creating it with default limits if needed."""
+        with self._lock:
+            limiter = self._limiters.get(name)
+            if limiter is None:
+                limiter = UpstreamLimiter(name, UPSTREAM_DEFAULT_REQUESTS_PER_MINUTE, UPSTREAM_DEFAULT_MAX_CONCURRENCY)
+                self._limiters[name] = limiter
+            return limiter
+
+    def call(self, name: str, fn: Callable[..., Any], *args, hold_slot: bool = True, **kwargs) -> Any:
+        """Call an upstream API function within its limits, retrying transient errors.
+
+        Args:
+            name: Upstream to charge the call to
+            fn: Function making the request
+            *args: Positional arguments for ``fn``
+            hold_slot: Take a concurrency slot for the call; pass False when the
+                caller already holds one for a long-running operation
+            **kwargs: Keyword arguments for ``fn``
+
+        Returns:
+            The return value of ``fn``
+        """
+        limiter = self.limiter(name)
+        attempt = 0
+        while True:
+            limiter.throttle()
+            if hold_slot:
+                limiter.acquire_slot()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    limiter._count("failures", 1)
+                    raise
+                if _genai_api_error(e) and e.code == 429:
+                    limiter.rate_limited()
+                error = e
+            finally:
+                if hold_slot:
+                    limiter.release_slot()
+
+            delay = retry_delay(attempt, self.base_delay, self.max_delay)
+            limiter._count("retries", 1)
+            emit_event("upstream_retry", upstream=name, attempt=attempt + 1, delay=round(delay, 2), error=str(error))
+            time.sleep(delay)
+            attempt += 1
+
+    @contextmanager
+    def slot(self, name: str):
+        """Hold one of the upstream's concurrency slots for the duration of the block."""
+        limiter = self.limiter(name)
+        limiter.acquire_slot()
+        try:
+            yield
+        finally:
+            limiter.release_slot()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return limits, queue depth and counters per upstream."""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.name: limiter.stats() for limiter in limiters}
+
+
+upstream = UpstreamScheduler()
@@ -0,0 +1,172 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+# Adaptive polling schedule: poll quickly right after submit, then back off up to a cap
+VEO_POLL_INITIAL_INTERVAL = float(os.getenv("VEO_POLL_INITIAL_INTERVAL", "2"))
+VEO_POLL_BACKOFF = float(os.getenv("VEO_POLL_BACKOFF", "1.5"))
+VEO_POLL_MAX_INTERVAL = float(os.getenv("VEO_POLL_MAX_INTERVAL", "20"))
+# Upper bound on operations.get calls issued in a single tick
+VEO_POLL_MAX_PER_TICK = int(os.getenv("VEO_POLL_MAX_PER_TICK", "8"))
+# Consecutive polling errors tolerated before an operation is failed
+VEO_POLL_MAX_ERRORS = int(os.getenv("VEO_POLL_MAX_ERRORS", "5"))
+
+
+class VeoOperationError(RuntimeError):
+    """Raised when a Veo operation finishes with an error."""
+
+
+class VeoOperationPoller:
+    """Shared poller that multiplexes every in-flight Veo operation.
+
+    All operations are tracked by a single asyncio loop running on a daemon
+    thread. Each operation is polled on its own adaptive schedule and at most
+    ``max_polls_per_tick`` polling calls are issued per tick, so many
+    concurrent segments cost a handful of requests instead of one sleeping
+    thread each.
+    """
+
+    def __init__(self,
+                 get_client,
+                 initial_interval: float = VEO_POLL_INITIAL_INTERVAL,
+                 backoff: float = VEO_POLL_BACKOFF,
+                 max_interval: float = VEO_POLL_MAX_INTERVAL,
+                 max_polls_per_tick: int = VEO_POLL_MAX_PER_TICK,
+                 max_errors: int = VEO_POLL_MAX_ERRORS,
+                 limiter=None):
+        # Resolved per poll so the client can be created lazily or swapped
+        self.get_client = get_client
+        self.initial_interval = initial_interval
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.max_polls_per_tick = max_polls_per_tick
+        self.max_errors = max_errors
+        # Optional UpstreamLimiter charged for every operations.get call
+        self.limiter = limiter
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._next_key = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._start_lock = threading.Lock()
+        self.polls = 0
+
+    def submit(self, operation) -> concurrent.futures.Future:
+        """Start tracking an operation.
+
+        Args:
+            operation: Operation returned by ``client.models.generate_videos``
+
+        Returns:
+            Future resolved with the finished operation
+        """
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(self._track(operation), loop)
+
+    def wait(self, operation, timeout: Optional[float] = None):
+        """Block the calling thread until the operation is done.
+
+        Args:
+            operation: Operation returned by ``client.models.generate_videos``
+            timeout: Maximum number of seconds to wait (None waits forever)
+
+        Returns:
+            The finished operation
+        """
+        return self.submit(operation).result(timeout)
+
+    async def wait_async(self, operation):
+        """Await the operation from any event loop."""
+        return await asyncio.wrap_future(self.submit(operation))
+
+    def pending(self) -> int:
+        """Number of operations currently being tracked."""
+        return len(self._entries)
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                ready = threading.Event()
+                thread = threading.Thread(target=self._thread_main, args=(ready,), name="veo-poller", daemon=True)
+                thread.start()
+                ready.wait()
+            return self._loop
+
+    def _thread_main(self, ready: threading.Event):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._wakeup = asyncio.Event()
+        self._loop = loop
+        ready.set()
+        loop.run_until_complete(self._run())
+
+    async def _track(self, operation):
+        if operation.done:
+            return self._resolve(operation)
+        future = self._loop.create_future()
+        key = self._next_key
+        self._next_key += 1
+        self._entries[key] = {
+            "operation": operation,
+            "future": future,
+            "interval": self.initial_interval,
+            "next_poll_at": time.monotonic() + self.initial_interval,
+            "errors": 0,
+        }
+        self._wakeup.set()
+        return await future
+
+    def _resolve(self, operation):
+        if operation.error:
+            raise VeoOperationError(f"Veo operation {operation.name} failed: {operation.error}")
+        return operation
+
+    async def _poll(self, key: int, entry: Dict[str, Any]):
+        try:
+            if self.limiter is not None:
+                await self.limiter.throttle_async()
+            operation = await self.get_client().aio.operations.get(entry["operation"])
+        except Exception as e:
+            entry["errors"] += 1
+            if entry["errors"] >= self.max_errors:
+                self._entries.pop(key, None)
+                entry["future"].set_exception(e)
+                return
+        else:
+            entry["errors"] = 0
+            entry["operation"] = operation
+            if operation.done:
+                self._entries.pop(key, None)
+                try:
+                    entry["future"].set_result(self._resolve(operation))
+                except VeoOperationError as e:
+                    entry["future"].set_exception(e)
+                return
+        entry["interval"] = min(entry["interval"] * self.backoff, self.max_interval)
+        entry["next_poll_at"] = time.monotonic() + entry["interval"]
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            if not self._entries:
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            due = sorted(
+                (item for item in self._entries.items() if item[1]["next_poll_at"] <= now),
+                key=lambda item: item[1]["next_poll_at"]
+            )[:self.max_polls_per_tick]
+            if due:
+                self.polls += len(due)
+                await asyncio.gather(*(self._poll(key, entry) for key, entry in due))
+                continue
+
+            delay = min(entry["next_poll_at"] for entry in self._entries.values()) - now
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0))
+            except asyncio.TimeoutError:
+                pass
@@ -1,13 +1,14 @@
-import time
-from google.genai import types
-from google import genai
-from IPython.display import Video, HTML
-from PIL import Image
-import io
-import imageio  # pip install imageio
-import subprocess
 import os
-from moviepy.editor import VideoFileClip, concatenate_videoclips
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from logic.clients import get_download_client, get_genai_client
+from logic.downloads import stream_to_file
+from logic.events import artifact_url, emit_event, raise_if_lease_lost, record_span, span, stage
+from logic.image_prep import prepare_image
+from logic.media import concat_videos, extract_last_frame
+from logic.run_ledger import completed_file, load_checkpoint, save_checkpoint
+from logic.upstream import VEO_MAX_CONCURRENCY, VEO_REQUESTS_PER_MINUTE, upstream
+from logic.veo_poller import VEO_POLL_MAX_PER_TICK, VeoOperationPoller
 
 
 
@@ -15,70 +16,214 @@ from moviepy.editor import VideoFileClip, concatenate_videoclips
 ASSETS_PATH = os.path.join(os.path.dirname(__file__), "..", "assets")
 
 
-GENAI_API_KEY = os.getenv("GENAI_API_KEY", "")
 VEO_MODEL_ID = "veo-3.0-fast-generate-preview"
-client = genai.Client(api_key=GENAI_API_KEY)
+# Concurrency of the Veo model counts in-flight operations, not requests
+veo_limiter = upstream.configure(VEO_MODEL_ID, requests_per_minute=VEO_REQUESTS_PER_MINUTE, max_concurrency=VEO_MAX_CONCURRENCY)
+VEO_FILES = "veo-files"
+upstream.configure(
+    VEO_FILES,
+    requests_per_minute=float(os.getenv("VEO_DOWNLOAD_RPM", "60")),
+    max_concurrency=int(os.getenv("VEO_DOWNLOAD_MAX_CONCURRENCY", "4"))
+)
+VEO_OPERATIONS = "veo-operations"
+upstream.configure(
+    VEO_OPERATIONS,
+    requests_per_minute=float(os.getenv("VEO_POLL_RPM", "120")),
+    max_concurrency=VEO_POLL_MAX_PER_TICK
+)
+# Shared across requests so all in-flight operations are polled by one loop
+veo_poller = VeoOperationPoller(get_genai_client, limiter=upstream.limiter(VEO_OPERATIONS))
 
-def generate_video(prompts: str, initial_image_path: str):
-    output_folder = os.path.join(ASSETS_PATH, "outputs", "veo3")
-    os.makedirs(output_folder, exist_ok=True)
+NEGATIVE_PROMPT = "low quality, low resolution, blurry, grainy, noise, jittery, shaky camera, black bars, letterbox, pillarbox, watermark, logo, timestamp, subtitles, compression artifacts, muted colors, vignette, chromatic aberration, over-saturated, film grain, ugly, cartoon, aliasing, unnatural proportions"
+ASPECT_RATIO = "16:9"
 
-    
-    # Initial input image
-    initial_image = initial_image_path
-    negative_prompt = "ugly, low quality, low resolution, blurry, grainy, cartoon, watermark, compression artifacts, aliasing, unnatural proportions"
-    negative_prompt = "low quality, low resolution, blurry, grainy, noise, jittery, shaky camera, black bars, letterbox, pillarbox, watermark, logo, timestamp, subtitles, compression artifacts, muted colors, vignette, chromatic aberration, over-saturated, film grain, ugly, cartoon, aliasing, unnatural proportions"
-    aspect_ratio = "16:9"
-    number_of_videos = 1
-    video_paths = []
-    image_path = initial_image
-    for idx, prompt in enumerate(prompts):
-        # print(idx)
-        # print(image_path)
-        # print(prompt)
-        # Load current input image
-        im = Image.open(image_path)
-        image_bytes_io = io.BytesIO()
-        im.save(image_bytes_io, format=im.format)
-        image_bytes = image_bytes_io.getvalue()
-        # Launch video generation
-        operation = client.models.generate_videos(
+
+def _submit_segment(prompt: str, image_path: str):
+    """Start a Veo generation for one segment from its start image."""
+    from google.genai import types
+
+    # Load current input image, re-encoding only if it is too large or in an unsupported format
+    image = prepare_image(image_path)
+    # Launch video generation
+    # The caller holds the Veo slot for the whole operation, not just this request
+    with span("veo_submit"):
+        return upstream.call(
+            VEO_MODEL_ID,
+            get_genai_client().models.generate_videos,
+            hold_slot=False,
             model=VEO_MODEL_ID,
             prompt=prompt,
-            image=types.Image(image_bytes=image_bytes, mime_type=im.format),
+            image=types.Image(image_bytes=image.data, mime_type=image.mime_type),
             config=types.GenerateVideosConfig(
-                aspect_ratio=aspect_ratio,
-                number_of_videos=number_of_videos,
-                negative_prompt=negative_prompt,
+                aspect_ratio=ASPECT_RATIO,
+                number_of_videos=1,
+                negative_prompt=NEGATIVE_PROMPT,
             ),
         )
-        # Wait for completion
-        while not operation.done:
-            time.sleep(20)
-            operation = client.operations.get(operation)
-            print(operation)
-        print(operation.result.generated_videos)
-        generated_video = operation.result.generated_videos[0]
-        out_path = os.path.join(output_folder, f"video_{idx}.mp4")
-        client.files.download(file=generated_video.video)
-        generated_video.video.save(out_path)
-        video_paths.append(out_path)
-        # Extract last frame to feed into next iteration
-        reader = imageio.get_reader(out_path, format='mp4')
-        last_frame = reader.get_data(reader.count_frames() - 1)
-        next_im = Image.fromarray(last_frame)
-        image_path = os.path.join(output_folder, f"frame_{idx}_last.png")
-        next_im.save(image_path)
-    print(image_path)
-    print("All videos generated and looped.")
 
-    # merge videos
-    clips = [VideoFileClip(path) for path in video_paths]
-    final_clip = concatenate_videoclips(clips, method="compose")
+
+def _segment_operation(idx: int, prompt: str, image_path: str, resume: bool = True):
+    """Return the segment's recorded Veo operation to re-attach to, or submit a new one.
+
+    Returns:
+        Tuple of (operation, whether it was re-attached)
+    """
+    client = get_genai_client()
+    recorded = load_checkpoint(f"veo_operation:{idx}") if resume else None
+    if recorded:
+        from google.genai import types
+        # The operation only exists for the key that submitted it
+        client.assign(recorded["name"], recorded["key"])
+        return types.GenerateVideosOperation(name=recorded["name"]), True
+    operation = _submit_segment(prompt, image_path)
+    # Recorded before waiting, so a restarted run picks up the paid-for operation
+    save_checkpoint(f"veo_operation:{idx}", {"name": operation.name, "key": client.key_for(operation.name)})
+    return operation, False
+
+
+def _resumed_segment(idx: int) -> str:
+    """Return the segment's video if an earlier attempt of the run already saved it."""
+    path = completed_file(f"segment:{idx}")
+    if path:
+        emit_event("stage_resumed", stage="segment", segment=idx, artifact_url=artifact_url(path))
+    return path
+
+
+def _download_segment(operation, out_path: str) -> str:
+    """Stream the video of a finished Veo operation to disk, without holding it in memory."""
+    raise_if_lease_lost("downloading the segment")
+    video = operation.result.generated_videos[0].video
+
+    def download(client, api_key):
+        # The video can only be fetched with the key whose project generated it
+        return stream_to_file(get_download_client(), video.uri, out_path, headers={"x-goog-api-key": api_key})
+
+    with span("veo_download"):
+        if video.video_bytes:
+            # Returned inline, nothing to download
+            video.save(out_path)
+        else:
+            upstream.call(VEO_FILES, get_genai_client().route, video.uri, download)
+    return out_path
+
+
+def generate_video(prompts: str, initial_image_path: str, output_folder: str = None, keyframe_paths: list = None):
+    """Generate one Veo segment per prompt and combine them into a single video.
+
+    By default segments are chained: each segment starts from the last frame
+    of the previous one, so they run strictly in series. When
+    ``keyframe_paths`` is given, every segment starts from its own keyframe
+    and all segments are generated at once.
+
+    Args:
+        prompts: One prompt per segment
+        initial_image_path: Start image of the first segment (chained mode)
+        output_folder: Directory for segments and the combined video (default: outputs/veo3)
+        keyframe_paths: Start image per prompt; enables parallel generation
+
+    Returns:
+        Path to the combined video
+    """
+    if output_folder is None:
+        output_folder = os.path.join(ASSETS_PATH, "outputs", "veo3")
+    os.makedirs(output_folder, exist_ok=True)
+
+    # Segments, last frames and the combined video saved by an earlier attempt of this run are reused
     combined_path = os.path.join(output_folder, "combined.mp4")
-    final_clip.write_videofile(combined_path, codec="libx264", audio_codec="aac")
+    if completed_file("combined") == combined_path:
+        emit_event("stage_resumed", stage="concat", artifact_url=artifact_url(combined_path))
+        return combined_path
+
+    video_paths = []
+    if keyframe_paths is not None:
+        if len(keyframe_paths) != len(prompts):
+            raise ValueError(f"Expected {len(prompts)} keyframes, got {len(keyframe_paths)}")
+        video_paths = [_resumed_segment(idx) or os.path.join(output_folder, f"video_{idx}.mp4")
+                       for idx in range(len(prompts))]
+        missing = [idx for idx in range(len(prompts)) if not completed_file(f"segment:{idx}")]
+        with stage("segments", count=len(missing)):
+            # Launch every segment up front; the poller tracks all of them together
+            futures = {}
+            submitted_at = {}
+            resumed = set()
+
+            def start(idx: int, resume: bool = True):
+                # A Veo slot is held from submit until the operation finishes
+                veo_limiter.acquire_slot()
+                try:
+                    operation, reattached = _segment_operation(idx, prompts[idx], keyframe_paths[idx], resume)
+                    future = veo_poller.submit(operation)
+                except BaseException:
+                    veo_limiter.release_slot()
+                    raise
+                future.add_done_callback(lambda _: veo_limiter.release_slot())
+                if reattached:
+                    resumed.add(idx)
+                futures[future] = idx
+                submitted_at[idx] = time.perf_counter()
+                return future
+
+            pending = {start(idx) for idx in missing}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx = futures[future]
+                    if future.exception() is not None and idx in resumed:
+                        # The recorded operation is gone or failed; generate the segment again
+                        print(f"Could not resume Veo operation for segment {idx}: {future.exception()}")
+                        resumed.discard(idx)
+                        pending.add(start(idx, resume=False))
+                        continue
+                    # Operations are polled off-thread; time them from submit to completion
+                    record_span("veo_poll", time.perf_counter() - submitted_at[idx],
+                                "error" if future.exception() else "ok")
+                    _download_segment(future.result(), video_paths[idx])
+                    save_checkpoint(f"segment:{idx}", video_paths[idx])
+                    emit_event("segment_finished", segment=idx, artifact_url=artifact_url(video_paths[idx]))
+        print("All videos generated from keyframes.")
+    else:
+        image_path = initial_image_path
+        for idx, prompt in enumerate(prompts):
+            out_path = _resumed_segment(idx)
+            last_frame = completed_file(f"last_frame:{idx}")
+            if out_path and last_frame:
+                video_paths.append(out_path)
+                image_path = last_frame
+                continue
+            with stage("segment", segment=idx) as segment:
+                if out_path is None:
+                    with upstream.slot(VEO_MODEL_ID):
+                        operation, reattached = _segment_operation(idx, prompt, image_path)
+                        # Wait for completion
+                        with span("veo_poll"):
+                            try:
+                                operation = veo_poller.wait(operation)
+                            except Exception as e:
+                                if not reattached:
+                                    raise
+                                # The recorded operation is gone or failed; generate the segment again
+                                print(f"Could not resume Veo operation for segment {idx}: {e}")
+                                operation, _ = _segment_operation(idx, prompt, image_path, resume=False)
+                                operation = veo_poller.wait(operation)
+                    out_path = _download_segment(operation, os.path.join(output_folder, f"video_{idx}.mp4"))
+                    save_checkpoint(f"segment:{idx}", out_path)
+                video_paths.append(out_path)
+                # Extract last frame to feed into next iteration
+                with span("last_frame"):
+                    image_path = extract_last_frame(out_path, os.path.join(output_folder, f"frame_{idx}_last.png"))
+                save_checkpoint(f"last_frame:{idx}", image_path)
+                segment["artifact_url"] = artifact_url(out_path)
+        print("All videos generated and looped.")
+
+    # merge videos
+    with stage("concat") as concat:
+        concat_method = concat_videos(video_paths, combined_path)
+        concat["method"] = concat_method
+        concat["artifact_url"] = artifact_url(combined_path)
+    save_checkpoint("combined", combined_path)
+    print(f"Combined {len(video_paths)} videos using {concat_method}")
 
-    return os.path.join(output_folder, "combined.mp4")
+    return combined_path
 
 
 if __name__ == "__main__":
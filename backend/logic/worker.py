@@ -0,0 +1,87 @@
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from logic.catalog import catalog
+from logic.events import run_events
+from logic.job_queue import (
+    JOB_HEARTBEAT_INTERVAL_SECONDS, MAX_CONCURRENT_JOBS, SharedJobStore, resolve_task, run_job,
+)
+from logic.memes import meme_library
+from logic.outbox import OUTBOX_WORKER_ENABLED, start_outbox_worker
+
+# How often an idle worker looks for queued jobs
+WORKER_POLL_INTERVAL_SECONDS = float(os.getenv("WORKER_POLL_INTERVAL_SECONDS", "1"))
+
+
+def _execute(store: SharedJobStore, worker_id: str, job: Dict):
+    status, result, error = run_job(resolve_task(job["task"]), job["id"], job["kwargs"])
+    store.finish(job["id"], worker_id, status, result=result, error=error)
+
+
+def run_worker(store: Optional[SharedJobStore] = None,
+               max_jobs: int = MAX_CONCURRENT_JOBS,
+               worker_id: Optional[str] = None,
+               stop: Optional[threading.Event] = None,
+               poll_interval: float = WORKER_POLL_INTERVAL_SECONDS,
+               heartbeat_interval: float = JOB_HEARTBEAT_INTERVAL_SECONDS):
+    """Claim and run jobs from the shared job store until ``stop`` is set.
+
+    Runs up to ``max_jobs`` jobs at once and heartbeats their leases. Run
+    events are written to the store for the API processes to relay. On stop,
+    jobs still running are handed back to the queue; another worker resumes
+    them from their checkpoints.
+    """
+    store = store or SharedJobStore()
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    stop = stop or threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="pipeline")
+    running = {}
+    last_heartbeat = time.monotonic()
+    run_events.add_listener(store.append_event)
+
+    print(f"Worker {worker_id} running up to {max_jobs} jobs from {store.path}")
+    try:
+        while not stop.is_set():
+            try:
+                running = {job_id: future for job_id, future in running.items() if not future.done()}
+                if running and time.monotonic() - last_heartbeat >= heartbeat_interval:
+                    cancelled, lost = store.heartbeat(worker_id, list(running))
+                    for job_id in cancelled:
+                        run_events.cancel(job_id)
+                    for job_id in lost:
+                        # The lease expired and another worker took the job over; stop without finishing the run
+                        run_events.lose_lease(job_id)
+                    store.prune_events()
+                    last_heartbeat = time.monotonic()
+                free = max_jobs - len(running)
+                for job in store.claim(worker_id, free) if free > 0 else []:
+                    run_events.claim(job["id"])
+                    if job["cancel_requested"]:
+                        run_events.cancel(job["id"])
+                    running[job["id"]] = executor.submit(_execute, store, worker_id, job)
+            except Exception as e:
+                print(f"Worker {worker_id} failed to poll the job store: {e}")
+            stop.wait(poll_interval)
+    finally:
+        store.release(worker_id, [job_id for job_id, future in running.items() if not future.done()])
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    # Worker process for JOB_BACKEND=shared; start as many as the host can run
+    catalog.load()
+    meme_library.load()
+    stop_outbox_worker = start_outbox_worker() if OUTBOX_WORKER_ENABLED else None
+    stop_worker = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop_worker.set())
+    run_worker(stop=stop_worker)
+    if stop_outbox_worker is not None:
+        stop_outbox_worker.set()
+    # Exit without waiting for the pipelines still running; their jobs were handed back to the queue
+    os._exit(0)
@@ -0,0 +1,139 @@
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+from logic.job_queue import job_queue
+
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets")
+# Every pipeline run writes into its own directory below RUNS_DIR
+RUNS_DIR = os.path.join(ASSETS_DIR, "outputs", "runs")
+
+# Retention policy for run workspaces
+OUTPUT_RETENTION_MAX_AGE_HOURS = float(os.getenv("OUTPUT_RETENTION_MAX_AGE_HOURS", "72"))
+OUTPUT_RETENTION_MAX_BYTES = int(os.getenv("OUTPUT_RETENTION_MAX_BYTES", str(20 * 1024 ** 3)))
+OUTPUT_SWEEP_INTERVAL_SECONDS = float(os.getenv("OUTPUT_SWEEP_INTERVAL_SECONDS", "600"))
+
+_active_runs = set()
+_active_lock = threading.Lock()
+
+
+def get_workspace_path(run_id: str) -> str:
+    """Return the output directory for a run (without creating it)."""
+    if not run_id or os.sep in run_id or run_id in (".", ".."):
+        raise ValueError(f"Invalid run id: {run_id!r}")
+    return os.path.join(RUNS_DIR, run_id)
+
+
+@contextmanager
+def run_workspace(run_id: str):
+    """Create the run's output directory and protect it from the sweeper while in use.
+
+    Args:
+        run_id: Id of the run (job id)
+
+    Yields:
+        Path to the run's output directory
+    """
+    path = get_workspace_path(run_id)
+    os.makedirs(path, exist_ok=True)
+    with _active_lock:
+        _active_runs.add(run_id)
+    try:
+        yield path
+    finally:
+        with _active_lock:
+            _active_runs.discard(run_id)
+        # Touch the directory so retention age counts from the end of the run
+        os.utime(path)
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def sweep_workspaces(max_age_hours: float = OUTPUT_RETENTION_MAX_AGE_HOURS,
+                     max_total_bytes: int = OUTPUT_RETENTION_MAX_BYTES) -> Dict[str, Any]:
+    """Delete run workspaces that exceed the retention policy.
+
+    Workspaces older than ``max_age_hours`` are removed first; if the
+    remaining ones still exceed ``max_total_bytes``, the oldest are removed
+    until the total fits. Workspaces of queued runs and runs in progress
+    (in this process or, with the shared job backend, on any worker) are
+    never touched.
+
+    Args:
+        max_age_hours: Maximum age of a workspace, based on its mtime
+        max_total_bytes: Maximum total size of all workspaces
+
+    Returns:
+        Dictionary with the removed run ids and the number of bytes freed
+    """
+    if not os.path.isdir(RUNS_DIR):
+        return {"removed": [], "freed_bytes": 0}
+
+    with _active_lock:
+        active = set(_active_runs)
+    active |= job_queue.active()
+
+    workspaces: List[Dict[str, Any]] = []
+    for run_id in os.listdir(RUNS_DIR):
+        path = os.path.join(RUNS_DIR, run_id)
+        if run_id in active or not os.path.isdir(path):
+            continue
+        workspaces.append({
+            "run_id": run_id,
+            "path": path,
+            "mtime": os.path.getmtime(path),
+            "size": _directory_size(path),
+        })
+    workspaces.sort(key=lambda w: w["mtime"])
+
+    cutoff = time.time() - max_age_hours * 3600
+    total = sum(w["size"] for w in workspaces)
+    removed: List[str] = []
+    freed = 0
+    for workspace in workspaces:
+        if workspace["mtime"] >= cutoff and total <= max_total_bytes:
+            continue
+        shutil.rmtree(workspace["path"], ignore_errors=True)
+        removed.append(workspace["run_id"])
+        freed += workspace["size"]
+        total -= workspace["size"]
+
+    return {"removed": removed, "freed_bytes": freed}
+
+
+def start_retention_sweeper(interval_seconds: float = OUTPUT_SWEEP_INTERVAL_SECONDS) -> threading.Event:
+    """Run ``sweep_workspaces`` periodically on a daemon thread.
+
+    Each sweep also forgets finished jobs older than the workspaces it keeps.
+
+    Returns:
+        Event that stops the sweeper when set
+    """
+    stop = threading.Event()
+
+    def loop():
+        while not stop.is_set():
+            try:
+                result = sweep_workspaces()
+                if result["removed"]:
+                    print(f"Removed {len(result['removed'])} run workspaces ({result['freed_bytes']} bytes)")
+                job_queue.prune(OUTPUT_RETENTION_MAX_AGE_HOURS)
+            except Exception as e:
+                print(f"Workspace sweep failed: {e}")
+            stop.wait(interval_seconds)
+
+    threading.Thread(target=loop, name="workspace-sweeper", daemon=True).start()
+    return stop
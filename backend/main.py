@@ -1,8 +1,22 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 import uvicorn
 from app_router import router
+from logic.catalog import catalog
+from logic.clients import genai_client_stats
+from logic.events import start_event_relay
+from logic.job_queue import JOB_BACKEND, job_queue
+from logic.memes import meme_library
+from logic import metrics
+from logic.pipeline import resume_run
+from logic.run_ledger import RUN_RESUME_ON_STARTUP, run_ledger
+from logic.outbox import OUTBOX_WORKER_ENABLED, publish_outbox, start_outbox_worker
+from logic.upstream import upstream
+from logic.uploads import UploadSizeLimitMiddleware
+from logic.video_generator import veo_poller
+from logic.workspace import start_retention_sweeper
 
 app = FastAPI(
     title="FastAPI Backend",
@@ -10,6 +24,8 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Added before CORSMiddleware, which wraps it, so its 413 responses carry CORS headers too
+app.add_middleware(UploadSizeLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -20,6 +36,61 @@ app.add_middleware(
 
 app.include_router(router)
 
+metrics.registry.callback(
+    "angeli_jobs", "Jobs known to the queue by status",
+    lambda: {(status,): count for status, count in job_queue.stats().items()}, ["status"]
+)
+metrics.registry.callback(
+    "angeli_upstream_waiting", "Calls waiting for an upstream token or slot",
+    lambda: {(name,): stats["waiting"] for name, stats in upstream.stats().items()}, ["upstream"]
+)
+metrics.registry.callback(
+    "angeli_upstream_in_flight", "Calls or operations holding an upstream slot",
+    lambda: {(name,): stats["in_flight"] for name, stats in upstream.stats().items()}, ["upstream"]
+)
+metrics.registry.callback(
+    "angeli_upstream_retries_total", "Upstream calls retried after a transient error",
+    lambda: {(name,): stats["retries"] for name, stats in upstream.stats().items()}, ["upstream"], type="counter"
+)
+metrics.registry.callback(
+    "angeli_outbox_posts", "Posts in the publish outbox by status",
+    lambda: {(status,): count for status, count in publish_outbox.stats().items()}, ["status"]
+)
+metrics.registry.callback(
+    "angeli_genai_key_in_flight", "Genai requests in flight per API key",
+    lambda: {(key,): stats["outstanding"] for key, stats in genai_client_stats().items()}, ["key"]
+)
+metrics.registry.callback(
+    "angeli_genai_key_requests_total", "Genai requests made per API key",
+    lambda: {(key,): stats["requests"] for key, stats in genai_client_stats().items()}, ["key"], type="counter"
+)
+metrics.registry.callback(
+    "angeli_veo_operations_pending", "Veo operations being polled",
+    lambda: {(): veo_poller.pending()}
+)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    catalog.load()
+    meme_library.load()
+    app.state.stop_sweeper = start_retention_sweeper()
+    app.state.stop_outbox_worker = start_outbox_worker() if OUTBOX_WORKER_ENABLED else None
+    # Shared jobs run on worker processes, which take over a crashed worker's runs when its lease expires
+    app.state.stop_event_relay = start_event_relay(job_queue.store) if JOB_BACKEND == "shared" else None
+    if RUN_RESUME_ON_STARTUP and JOB_BACKEND != "shared":
+        for run_id in run_ledger.interrupted():
+            print(f"Resuming interrupted run {run_id}")
+            resume_run(run_id)
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    app.state.stop_sweeper.set()
+    if app.state.stop_outbox_worker is not None:
+        app.state.stop_outbox_worker.set()
+    if app.state.stop_event_relay is not None:
+        app.state.stop_event_relay.set()
+    job_queue.shutdown()
+
 @app.get("/health")
 async def health_check():
     return {
@@ -28,5 +99,9 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
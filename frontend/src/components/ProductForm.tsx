@@ -1,4 +1,48 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
+
+const API_URL = 'http://localhost:8005';
+
+interface RunEvent {
+  seq: number;
+  type: string;
+  stage?: string;
+  scene?: number;
+  segment?: number;
+  duration_ms?: number;
+  artifact_url?: string;
+  error?: string;
+  platform?: string;
+  success?: boolean;
+  upstream?: string;
+  attempt?: number;
+  delay?: number;
+}
+
+const describeEvent = (event: RunEvent): string => {
+  const target = event.segment !== undefined
+    ? ` #${event.segment + 1}`
+    : event.scene !== undefined ? ` #${event.scene + 1}` : '';
+  switch (event.type) {
+    case 'stage_started':
+      return `${event.stage}${target} started`;
+    case 'stage_finished':
+      return `${event.stage}${target} done in ${((event.duration_ms ?? 0) / 1000).toFixed(1)}s`;
+    case 'stage_resumed':
+      return `${event.stage}${target} reused from an earlier attempt`;
+    case 'stage_failed':
+      return `${event.stage}${target} failed: ${event.error}`;
+    case 'segment_finished':
+      return `segment${target} ready`;
+    case 'storyboard_scene':
+      return `scene${target} written`;
+    case 'publish_platform':
+      return event.success ? `published to ${event.platform}` : `publishing to ${event.platform} failed: ${event.error}`;
+    case 'upstream_retry':
+      return `${event.upstream} busy, retry ${event.attempt} in ${event.delay}s`;
+    default:
+      return event.type.replace('_', ' ');
+  }
+};
 
 interface ProductFormData {
   productImage: File | null;
@@ -16,6 +60,37 @@ const ProductForm: React.FC = () => {
   });
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [message, setMessage] = useState('');
+  const [runId, setRunId] = useState<string | null>(null);
+  const [runEvents, setRunEvents] = useState<RunEvent[]>([]);
+  const eventSourceRef = useRef<EventSource | null>(null);
+
+  useEffect(() => () => eventSourceRef.current?.close(), []);
+
+  const followRun = (id: string, eventsUrl: string) => {
+    eventSourceRef.current?.close();
+    setRunId(id);
+    setRunEvents([]);
+    const source = new EventSource(`${API_URL}${eventsUrl}`);
+    const onEvent = (e: MessageEvent) => {
+      const event: RunEvent = JSON.parse(e.data);
+      setRunEvents(events => [...events, event]);
+      if (['run_succeeded', 'run_failed', 'run_cancelled'].includes(event.type)) {
+        source.close();
+        setRunId(null);
+      }
+    };
+    ['run_queued', 'run_started', 'stage_started', 'stage_finished', 'stage_resumed', 'stage_failed',
+     'storyboard_scene', 'segment_finished', 'upstream_retry', 'publish_platform',
+     'run_succeeded', 'run_failed', 'run_cancelled']
+      .forEach(type => source.addEventListener(type, onEvent as EventListener));
+    eventSourceRef.current = source;
+  };
+
+  const cancelRun = async () => {
+    if (runId) {
+      await fetch(`${API_URL}/api/runs/${runId}/cancel`, { method: 'POST' });
+    }
+  };
 
   const handleImageChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     if (e.target.files && e.target.files[0]) {
@@ -46,12 +121,14 @@ const ProductForm: React.FC = () => {
     submitData.append('personality', formData.vibeCheck);
 
     try {
-      const response = await fetch('http://localhost:8005/api/generate_scene', {
+      const response = await fetch(`${API_URL}/api/generate_scene`, {
         method: 'POST',
         body: submitData
       });
 
       if (response.ok) {
+        const run = await response.json();
+        followRun(run.run_id, run.events_url);
         setMessage('Influencer booked! Campaign in production.');
         setFormData({
           productImage: null,
@@ -177,6 +254,24 @@ const ProductForm: React.FC = () => {
             {message}
           </div>
         )}
+
+        {runEvents.length > 0 && (
+          <ul className="run-progress">
+            {runEvents.map(event => (
+              <li key={event.seq}>
+                {event.artifact_url
+                  ? <a href={`${API_URL}${event.artifact_url}`} target="_blank" rel="noreferrer">{describeEvent(event)}</a>
+                  : describeEvent(event)}
+              </li>
+            ))}
+          </ul>
+        )}
+
+        {runId && (
+          <button type="button" className="cancel-btn" onClick={cancelRun}>
+            <span>Cancel Run</span>
+          </button>
+        )}
       </form>
       
       <div className="future-statement">